@@ -2,22 +2,51 @@
 Complete Interior Design API - Image Generation + Video Generation
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Form
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Dict, Tuple, Union, Callable, Iterable
 import torch
-from diffusers import StableDiffusionPipeline, StableVideoDiffusionPipeline
+from diffusers import StableDiffusionPipeline, StableDiffusionImg2ImgPipeline, StableVideoDiffusionPipeline
+from diffusers import (
+    DPMSolverMultistepScheduler,
+    UniPCMultistepScheduler,
+    EulerAncestralDiscreteScheduler,
+    LCMScheduler
+)
+from diffusers.models.attention_processor import AttnProcessor2_0
 from PIL import Image, ImageEnhance
 import imageio
 import numpy as np
 import os
+import re
+import sys
+import time
 import uuid
-import shutil
+import json
+import gc
+import signal
+import hashlib
+import socket
+import queue
+import asyncio
+import threading
+import multiprocessing
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+from job_store import JobStore, AdmissionRefused, TERMINAL_STATUSES
+from prefork import fork_process, fork_supported, freeze_heap, memory_report
+from result_cache import ResultCache, content_key, link_or_copy
+from frame_interpolation import FrameInterpolator, INTERPOLATION_METHODS, interpolation_factor
+from stage_pipeline import StagePipeline
+from uploads import UploadError, UploadSizeLimit, StoredUpload, open_image, save_upload
+
 # ============================================================================
 # Configuration
 # ============================================================================
@@ -27,7 +56,83 @@ class Config:
     OUTPUT_DIR = "outputs"
     GENERATED_IMAGES_DIR = "generated_images"
     TEMP_DIR = "temp"
+    JOB_DB_PATH = "jobs.db"  # SQLite job store shared by all API workers
+    RESULT_CACHE_DIR = "cache/videos"  # Content-addressed finished videos
+    RESULT_CACHE_MAX_MB = 2048  # LRU disk budget for the result cache
+    IMAGE_CACHE_DIR = "cache/images"  # Uploaded images by content hash (see image_hash)
+    IMAGE_CACHE_MAX_MB = 1024  # LRU disk budget for uploaded images
+    CONDITIONING_CACHE_MB = 256  # In-memory budget for SVD image conditioning
+    PROMPT_CACHE_MB = 64  # In-memory budget for text encoder outputs (~240 KB each)
+    MAX_VIDEO_VARIANTS = 4  # Motion styles rendered together in one SVD call
+    WORKER_POLL_INTERVAL = 0.5  # Seconds between queue checks when idle
+    WORKER_LEASE_TTL = 30  # Seconds before a dead worker's lease can be taken over
+    CANCEL_CHECK_INTERVAL = 1.0  # Min seconds between cancellation checks of a running job
+    # Active jobs nobody has polled (status, events, websocket) for this many
+    # seconds are cancelled; 0 disables
+    JOB_ABANDON_TIMEOUT = int(os.getenv("JOB_ABANDON_TIMEOUT", "600"))
+    # Finished jobs (and their files) are deleted this many hours after they
+    # complete, fail or are cancelled; 0 keeps them forever
+    JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+    # Inference processes on CPU hosts. >1 loads the models once, then forks
+    # the processes so they share the weights copy-on-write.
+    INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", "1"))
+    MEMORY_REPORT_INTERVAL = 10  # Seconds between memory accounting updates
+    # RAM budget for resident pipelines (single inference process only; None
+    # keeps every model resident). Over budget, the least recently used model
+    # with the least queued demand is unloaded and reloaded from the
+    # memory-mapped local cache (see --prepare-models) when needed again
+    MODEL_RAM_BUDGET_GB = float(os.getenv("MODEL_RAM_BUDGET_GB", "0")) or None
+    # Planning estimates until a model's real footprint has been measured
+    MODEL_RAM_ESTIMATE_GB = {"image": 4.0, "video": 9.0}
+    # VAE decode working memory per video frame (at 384x384) and the share
+    # of free memory a decode may use; bounds the adaptive decode chunk size
+    VAE_DECODE_MB_PER_FRAME = 400
+    VAE_DECODE_MEMORY_SHARE = 0.5
+    MAX_DECODE_CHUNK = 8
+    
+    # Cross-job micro-batching of text-to-image requests
+    IMAGE_BATCH_MAX_SIZE = 4  # Max prompts per pipeline call
+    IMAGE_BATCH_MAX_PIXELS = 4 * 512 * 512  # Memory bound: total pixels per batch
+    IMAGE_BATCH_MAX_WAIT = 0.2  # Seconds to wait for compatible jobs to arrive
+    # Two-tier ("draft") image generation: a quick low-res draft, then an
+    # img2img refinement at the requested size
+    DRAFT_SIZE = 384  # Long side of the draft image
+    REFINE_STRENGTH = 0.45  # img2img strength (fraction of steps re-run at full size)
+    LIVE_PREVIEW_SIZE = 256  # Side of live latent preview JPEGs (pixels)
+    PROGRESS_MIN_INTERVAL = 0.25  # Max rate of per-step progress writes (seconds)
+    EVENT_POLL_INTERVAL = 0.5  # How often event streams check the job store
+    EVENT_KEEPALIVE = 15  # Seconds between keep-alive comments on idle streams
+    LONG_POLL_MAX_WAIT = 60  # Upper bound for ?wait= on /api/v1/status
+    VIDEO_STREAM_CHUNK = 256 * 1024  # Bytes per read when streaming a growing MP4
+    VIDEO_STREAM_POLL = 0.25  # Seconds to wait for the encoder to append more
+    VIDEO_FRAGMENT_SECONDS = 0.5  # Keyframe (and so fragment) interval of streamed MP4s
+    # Scheduling: higher priority classes are claimed first; within a class
+    # clients take turns (see JobStore.claim_next)
+    JOB_PRIORITIES = {"image": 2, "video": 1, "video-variants": 1, "image-to-video": 0}
+    QUEUE_LIMITS = {"image": 200, "video": 30, "video-variants": 10, "image-to-video": 30}
+    CLIENT_MAX_ACTIVE_JOBS = 5  # Queued + running jobs per client
+    DURATION_STATS_TTL = 30  # Seconds a measured average job duration is reused
+    # Typical run time per job type until enough jobs completed to measure it
+    DEFAULT_JOB_SECONDS = {"image": 20, "video": 180, "video-variants": 360,
+                           "image-to-video": 210}
+    # Single-process worker: run image jobs on their own thread so they are
+    # not stuck behind multi-minute video jobs
+    INTERACTIVE_LANE = True
+    INTERACTIVE_JOB_TYPES = ("image",)
+    # Single-process worker: run image-to-video jobs through a pipeline of
+    # stages (image UNet, video UNet, VAE decode, encode), each on its own
+    # thread, so one job's decode/encode overlaps the next job's diffusion
+    STAGED_IMAGE_TO_VIDEO = True
+    STAGE_QUEUE_SIZE = 1  # Jobs waiting in front of each stage
+    STAGE_FRAME_BUFFER = 2  # Decoded frame chunks held between decode and encode
+    STAGE_STATS_WINDOW = 300  # Seconds of history for stage utilization
+    # CPU hosts, single-process worker: torch threads of each concurrently
+    # running role, as shares of CPU_THREADS (or all CPUs). Image UNet work
+    # (interactive lane, image stage) and video UNet work (worker loop,
+    # video stage) each take turns on their pipeline, so three roles overlap
+    CPU_THREAD_SHARES = {"image": 1, "video": 2, "vae_decode": 1}
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    MAX_IMAGE_PIXELS = 40_000_000  # Uploads larger than this (e.g. decompression bombs) are refused
     ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
     
     # Model IDs
@@ -35,6 +140,114 @@ class Config:
     VIDEO_MODEL_ID = "stabilityai/stable-video-diffusion-img2vid"
     
     HUGGINGFACE_TOKEN = None  # Set if needed
+    # LCM-LoRA enabling 4-8 step generation with the "lcm" sampler, e.g.
+    # "latent-consistency/lcm-lora-sdv1-5" (None disables the lcm sampler)
+    LCM_LORA_ID = None
+    
+    # Local model cache: pipelines saved here (see --prepare-models) load from
+    # memory-mapped safetensors without touching the network
+    MODEL_CACHE_DIR = "models"
+    
+    # Inference profile ("auto" picks per device, see select_inference_profile)
+    INFERENCE_DTYPE = "auto"  # "auto", "float16", "bfloat16" or "float32"
+    CPU_THREADS = None  # None = all CPUs available to this process
+    TORCH_COMPILE = False  # torch.compile the UNet (slow first start, faster steps)
+    ATTENTION_SLICING_BELOW_GB = 16  # Use sliced attention on CPU hosts with less RAM
+    # CPU inference backend: "eager" or "int8" (UNet and VAE Linear layers
+    # dynamically quantized to int8, cached under MODEL_CACHE_DIR); check
+    # output quality against eager with --check-backend
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "eager")
+    BACKEND_MIN_PSNR = 25.0  # dB vs eager output for --check-backend to pass
+
+# ============================================================================
+# Samplers and Presets
+# ============================================================================
+
+# Scheduler class and extra config per sampler name ("default" keeps the
+# scheduler the model ships with)
+SAMPLERS = {
+    "default": (None, {}),
+    "dpmpp": (DPMSolverMultistepScheduler,
+              {"algorithm_type": "dpmsolver++", "use_karras_sigmas": True}),
+    "unipc": (UniPCMultistepScheduler, {}),
+    "euler_a": (EulerAncestralDiscreteScheduler, {}),
+    "lcm": (LCMScheduler, {})
+}
+
+# Benchmark table: step range per sampler in which SD 1.5 output quality
+# holds up (published sampler comparisons at 512x512). Below the minimum,
+# images visibly degrade; above the maximum, extra steps add time without
+# measurable gain. Re-measure on this model with --benchmark-samplers.
+SAMPLER_BENCHMARKS = {
+    "default": {"min_steps": 10, "max_steps": 50},
+    "dpmpp": {"min_steps": 8, "max_steps": 50},
+    "unipc": {"min_steps": 8, "max_steps": 50},
+    "euler_a": {"min_steps": 15, "max_steps": 50},
+    "lcm": {"min_steps": 4, "max_steps": 8},
+    "svd_euler": {"min_steps": 6, "max_steps": 50}  # SVD's own scheduler
+}
+
+IMAGE_PRESETS = {
+    # Interactive chat previews: LCM when its LoRA is configured
+    "preview": {"sampler": "lcm", "num_inference_steps": 6, "guidance_scale": 1.5},
+    "fast": {"sampler": "dpmpp", "num_inference_steps": 12, "guidance_scale": 7.0},
+    "balanced": {"sampler": "unipc", "num_inference_steps": 20, "guidance_scale": 7.5},
+    "quality": {"sampler": "dpmpp", "num_inference_steps": 30, "guidance_scale": 7.5}
+}
+# Used for "preview" when no LCM weights are configured
+PREVIEW_FALLBACK = {"sampler": "dpmpp", "num_inference_steps": 8, "guidance_scale": 5.0}
+
+# SVD only works with its EDM Euler scheduler, so video presets pick steps
+VIDEO_PRESETS = {
+    "preview": {"num_inference_steps": 6},
+    "fast": {"num_inference_steps": 10},
+    "quality": {"num_inference_steps": 25}
+}
+
+def check_sampler_steps(sampler: str, steps: int):
+    """Raise ValueError if ``steps`` is outside the sampler's benchmarked range"""
+    # SAMPLER_BENCHMARKS also covers svd_euler, which is not an image sampler
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler '{sampler}'. Available: {list(SAMPLERS)}")
+    if sampler == "lcm" and not Config.LCM_LORA_ID:
+        raise ValueError("The lcm sampler needs Config.LCM_LORA_ID")
+    bench = SAMPLER_BENCHMARKS[sampler]
+    if not bench["min_steps"] <= steps <= bench["max_steps"]:
+        raise ValueError(
+            f"Sampler '{sampler}' needs {bench['min_steps']}-{bench['max_steps']} "
+            f"steps (got {steps})"
+        )
+
+def resolve_image_preset(name: str) -> dict:
+    if name not in IMAGE_PRESETS:
+        raise ValueError(f"Unknown preset '{name}'. Available: {list(IMAGE_PRESETS)}")
+    preset = IMAGE_PRESETS[name]
+    if preset["sampler"] == "lcm" and not Config.LCM_LORA_ID:
+        preset = PREVIEW_FALLBACK
+    return preset
+
+def resolve_video_preset(name: str) -> dict:
+    if name not in VIDEO_PRESETS:
+        raise ValueError(f"Unknown preset '{name}'. Available: {list(VIDEO_PRESETS)}")
+    return VIDEO_PRESETS[name]
+
+def check_interpolation(method: str):
+    if method not in INTERPOLATION_METHODS:
+        raise ValueError(f"Unknown interpolation '{method}'. "
+                         f"Choose from: {', '.join(INTERPOLATION_METHODS)}")
+
+def validate_presets():
+    """Check every preset against the benchmark table (run at import)"""
+    for name, preset in list(IMAGE_PRESETS.items()) + [("preview-fallback", PREVIEW_FALLBACK)]:
+        bench = SAMPLER_BENCHMARKS[preset["sampler"]]
+        if not bench["min_steps"] <= preset["num_inference_steps"] <= bench["max_steps"]:
+            raise ValueError(f"Image preset '{name}' is outside the benchmarked range")
+    for name, preset in VIDEO_PRESETS.items():
+        bench = SAMPLER_BENCHMARKS["svd_euler"]
+        if not bench["min_steps"] <= preset["num_inference_steps"] <= bench["max_steps"]:
+            raise ValueError(f"Video preset '{name}' is outside the benchmarked range")
+
+validate_presets()
 
 # ============================================================================
 # Models
@@ -46,10 +259,37 @@ class ImageGenerationRequest(BaseModel):
         default="living_room",
         description="Type of room for optimization"
     )
-    num_inference_steps: int = Field(default=20, ge=10, le=50)
+    num_inference_steps: int = Field(default=20, ge=1, le=50)
     guidance_scale: float = Field(default=7.5, ge=1.0, le=20.0)
     width: int = Field(default=512, ge=256, le=1024)
     height: int = Field(default=512, ge=256, le=1024)
+    sampler: str = Field(
+        default="default",
+        description="Sampler: default, dpmpp, unipc, euler_a or lcm"
+    )
+    preset: Optional[str] = Field(
+        default=None,
+        description="Speed/quality preset (preview, fast, balanced, quality); "
+                    "overrides sampler, steps and guidance"
+    )
+    draft: bool = Field(
+        default=False,
+        description="Publish a fast low-res draft as preview_url first, then refine it"
+    )
+    preview_every: Optional[int] = Field(
+        default=None, ge=1, le=50,
+        description="Publish an approximate preview of the image every N denoising steps"
+    )
+    
+    @model_validator(mode="after")
+    def apply_preset(self):
+        if self.preset:
+            preset = resolve_image_preset(self.preset)
+            self.sampler = preset["sampler"]
+            self.num_inference_steps = preset["num_inference_steps"]
+            self.guidance_scale = preset["guidance_scale"]
+        check_sampler_steps(self.sampler, self.num_inference_steps)
+        return self
 
 class VideoGenerationRequest(BaseModel):
     room_type: str = Field(
@@ -65,13 +305,54 @@ class VideoGenerationRequest(BaseModel):
     )
     enhance_lighting: bool = Field(default=True)
     adjust_contrast: bool = Field(default=True)
+    preset: str = Field(default="fast", description="Video preset: preview, fast or quality")
+    target_fps: Optional[int] = Field(
+        default=None, ge=1, le=60,
+        description="Interpolate the generated frames up to this frame rate"
+    )
+    interpolation: str = Field(default="blend", description="Interpolation method: blend or motion")
+    
+    @model_validator(mode="after")
+    def check_preset(self):
+        resolve_video_preset(self.preset)
+        check_interpolation(self.interpolation)
+        return self
+    
+    @property
+    def num_inference_steps(self) -> int:
+        return resolve_video_preset(self.preset)["num_inference_steps"]
 
 class ImageToVideoRequest(BaseModel):
     prompt: str = Field(..., description="Description of the interior design")
     room_type: str = Field(default="living_room")
     motion_style: str = Field(default="moderate")
-    num_inference_steps: int = Field(default=20, ge=10, le=50)
+    num_inference_steps: int = Field(default=20, ge=1, le=50)
     guidance_scale: float = Field(default=7.5, ge=1.0, le=20.0)
+    sampler: str = Field(default="default")
+    preset: Optional[str] = Field(
+        default=None,
+        description="Preset for both stages (image: preview/fast/balanced/quality, "
+                    "video: preview/fast/quality)"
+    )
+    target_fps: Optional[int] = Field(default=None, ge=1, le=60)
+    interpolation: str = Field(default="blend")
+    
+    @model_validator(mode="after")
+    def apply_preset(self):
+        if self.preset:
+            preset = resolve_image_preset(self.preset)
+            self.sampler = preset["sampler"]
+            self.num_inference_steps = preset["num_inference_steps"]
+            self.guidance_scale = preset["guidance_scale"]
+        check_sampler_steps(self.sampler, self.num_inference_steps)
+        check_interpolation(self.interpolation)
+        return self
+    
+    @property
+    def video_steps(self) -> int:
+        # "balanced" has no video counterpart; it maps to the default "fast"
+        name = self.preset if self.preset in VIDEO_PRESETS else "fast"
+        return resolve_video_preset(name)["num_inference_steps"]
 
 class JobResponse(BaseModel):
     job_id: str
@@ -79,6 +360,7 @@ class JobResponse(BaseModel):
     message: str
     image_url: Optional[str] = None
     video_url: Optional[str] = None
+    image_hash: Optional[str] = None  # SHA-256 of the input image, usable as a reference
 
 class JobStatus(BaseModel):
     job_id: str
@@ -88,10 +370,443 @@ class JobStatus(BaseModel):
     job_type: str
     image_url: Optional[str] = None
     video_url: Optional[str] = None
+    preview_url: Optional[str] = None
     created_at: str
     completed_at: Optional[str] = None
     duration: Optional[float] = None
     frames: Optional[int] = None
+    version: int = 0
+    stage: Optional[str] = None
+    step: Optional[int] = None
+    total_steps: Optional[int] = None
+    eta_seconds: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None
+    batch_size: Optional[int] = None
+    cached: Optional[bool] = None
+    variants: Optional[List[Dict[str, Union[str, float, int]]]] = None
+    priority: Optional[int] = None
+    estimated_start: Optional[str] = None
+
+# ============================================================================
+# Cancellation
+# ============================================================================
+
+class JobCancelled(Exception):
+    """Raised inside a pipeline call to stop work for cancelled jobs"""
+
+class CancellationCheck:
+    """Polls the job store to see whether the running jobs were cancelled.
+
+    A batch is only stopped once every job in it is cancelled or deleted;
+    results of individually cancelled jobs are discarded by the worker.
+    """
+    def __init__(self, job_ids: List[str]):
+        self.job_ids = job_ids
+        self.last_check = 0.0
+    
+    def __call__(self):
+        now = time.monotonic()
+        if now - self.last_check < Config.CANCEL_CHECK_INTERVAL:
+            return
+        self.last_check = now
+        statuses = job_store.statuses(self.job_ids)
+        if all(statuses.get(job_id, "cancelled") == "cancelled" for job_id in self.job_ids):
+            raise JobCancelled(", ".join(self.job_ids))
+
+# Check for the jobs running on this thread (set by the worker loop)
+cancellation = threading.local()
+
+def check_cancelled():
+    """Raise JobCancelled if the current thread's jobs were cancelled"""
+    check = getattr(cancellation, "check", None)
+    if check is not None:
+        check()
+
+@contextmanager
+def cancellable(job_ids: List[str]):
+    cancellation.check = CancellationCheck(job_ids)
+    try:
+        yield
+    finally:
+        cancellation.check = None
+
+# ============================================================================
+# Progress Tracking
+# ============================================================================
+
+class ProgressTracker:
+    """Turns diffusers step callbacks into progress, ETA and stage timings.
+
+    ``report`` receives keyword fields (progress, stage, step, total_steps,
+    eta_seconds, timings) and is typically ``update_job`` bound to a job id.
+    Progress is mapped into the ``[start, end]`` percent range so several
+    pipelines can share one job's progress bar.
+    """
+    def __init__(self, report=None, start: int = 0, end: int = 100):
+        self.report = report
+        self.start = start
+        self.end = end
+        self.timings = {}
+        self.total_steps = 0
+        self.stage_started = None
+        self.denoise_started = None
+        self.last_report = 0.0
+        self.step_hooks = []  # Called as hook(step, callback_kwargs) after each step
+    
+    def _emit(self, force: bool = False, **fields):
+        if self.report is None:
+            return
+        now = time.perf_counter()
+        if not force and now - self.last_report < Config.PROGRESS_MIN_INTERVAL:
+            return
+        self.last_report = now
+        self.report(**fields)
+    
+    def begin_denoise(self, total_steps: int):
+        self.total_steps = total_steps
+        self.denoise_started = time.perf_counter()
+        self._emit(force=True, stage="denoise", step=0, total_steps=total_steps,
+                   progress=self.start)
+    
+    def on_step_end(self, pipe, step: int, timestep, callback_kwargs):
+        """``callback_on_step_end`` hook for diffusers pipelines"""
+        check_cancelled()
+        done = step + 1
+        elapsed = time.perf_counter() - self.denoise_started
+        eta = elapsed / done * (self.total_steps - done)
+        progress = self.start + (self.end - self.start) * done / self.total_steps
+        
+        if done == self.total_steps:
+            # The remaining pipeline time is the VAE decode
+            self.timings["denoise"] = round(elapsed, 3)
+            self.stage_started = time.perf_counter()
+        
+        self._emit(force=done == self.total_steps, stage="denoise", step=done,
+                   total_steps=self.total_steps, progress=int(progress),
+                   eta_seconds=round(eta, 1))
+        for hook in self.step_hooks:
+            hook(done, callback_kwargs)
+        return callback_kwargs
+    
+    def end_decode(self):
+        if self.stage_started is not None:
+            self.timings["vae_decode"] = round(time.perf_counter() - self.stage_started, 3)
+    
+    def add_timing(self, name: str, seconds: float):
+        """Accumulate time for a stage that runs interleaved with another"""
+        self.timings[name] = round(self.timings.get(name, 0) + seconds, 3)
+    
+    def begin_stage(self, name: str):
+        check_cancelled()
+        self.stage_started = time.perf_counter()
+        self._emit(force=True, stage=name, timings=self.timings)
+    
+    def end_stage(self, name: str):
+        self.timings[name] = round(time.perf_counter() - self.stage_started, 3)
+        self._emit(force=True, stage=name, progress=self.end, eta_seconds=0,
+                   timings=self.timings)
+
+# Linear map from SD 1.x latent channels to RGB (least-squares fit against
+# VAE decodes); good enough to show composition and colour mid-denoise at a
+# tiny fraction of a VAE decode
+LATENT_RGB_FACTORS = torch.tensor([
+    #   R        G        B
+    [ 0.3512,  0.2297,  0.3227],
+    [ 0.3250,  0.4974,  0.2350],
+    [-0.2829,  0.1762,  0.2721],
+    [-0.2120, -0.2616, -0.7177],
+])
+
+def latents_to_rgb(latents: torch.Tensor) -> List[Image.Image]:
+    """Approximate RGB images from ``[batch, 4, h, w]`` latents"""
+    latents = latents.detach().float().cpu()
+    rgb = torch.einsum("bchw,cr->bhwr", latents, LATENT_RGB_FACTORS)
+    rgb = ((rgb + 1) / 2).clamp(0, 1).mul(255).round().to(torch.uint8).numpy()
+    return [Image.fromarray(image) for image in rgb]
+
+class LatentPreviewer:
+    """Step hook that publishes approximate previews of images in progress.
+
+    ``targets`` holds ``(batch_index, job_id, every)``: the image at
+    ``batch_index`` is previewed every ``every`` steps. Only the latents are
+    copied on the inference thread; projection and JPEG encoding run on
+    ``writer``.
+    """
+    def __init__(self, targets: List[tuple], writer: ThreadPoolExecutor, update_job):
+        self.targets = targets
+        self.writer = writer
+        self.update_job = update_job
+        self.pending = []
+    
+    def __call__(self, step: int, callback_kwargs: dict):
+        due = [(index, job_id) for index, job_id, every in self.targets if step % every == 0]
+        if not due:
+            return
+        latents = callback_kwargs["latents"]
+        snapshot = torch.stack([latents[index] for index, _ in due]).detach().cpu()
+        self.pending.append(self.writer.submit(self.publish, snapshot,
+                                               [job_id for _, job_id in due], step))
+    
+    def publish(self, latents: torch.Tensor, job_ids: List[str], step: int):
+        size = (Config.LIVE_PREVIEW_SIZE, Config.LIVE_PREVIEW_SIZE)
+        for job_id, image in zip(job_ids, latents_to_rgb(latents)):
+            save_preview(image.resize(size, Image.Resampling.BILINEAR), job_id, quality=80)
+            # The query string changes per step so clients know to reload
+            self.update_job(job_id, preview_url=f"/api/v1/download/preview/{job_id}?step={step}")
+    
+    def wait(self):
+        """Let in-flight previews land before the job is marked completed"""
+        for future in self.pending:
+            future.result()
+        self.pending = []
+
+# ============================================================================
+# Inference Profile
+# ============================================================================
+
+DTYPES = {
+    "float16": torch.float16,
+    "bfloat16": torch.bfloat16,
+    "float32": torch.float32
+}
+
+def cpu_supports_bf16() -> bool:
+    """True if the CPU has native bf16 matmul support (AVX512-BF16 or AMX)"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+def total_memory_gb() -> Optional[float]:
+    """Physical RAM in GB (None if it cannot be determined)"""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 3
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def available_memory_gb(device: str = "cpu") -> Optional[float]:
+    """Memory that can be allocated right now without swapping, in GB"""
+    if device == "cuda":
+        free, _ = torch.cuda.mem_get_info()
+        return free / 1024 ** 3
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024 ** 2
+    except OSError:
+        pass
+    return None
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects container cpusets)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+INFERENCE_BACKENDS = ("eager", "int8")
+
+class InferenceProfile:
+    """Precision and kernel settings chosen for the device a pipeline runs on"""
+    def __init__(self, device: str, dtype: torch.dtype, channels_last: bool,
+                 attention: str, num_threads: Optional[int], compile_unet: bool,
+                 backend: str = "eager"):
+        self.device = device
+        self.dtype = dtype
+        self.channels_last = channels_last
+        self.attention = attention  # "sdpa" or "sliced"
+        self.num_threads = num_threads
+        self.compile_unet = compile_unet
+        self.backend = backend
+    
+    def apply_threads(self):
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+    
+    def apply(self, pipe):
+        """Apply memory format and attention settings to a loaded pipeline"""
+        if self.channels_last:
+            pipe.unet.to(memory_format=torch.channels_last)
+            pipe.vae.to(memory_format=torch.channels_last)
+        if self.attention == "sliced":
+            pipe.enable_attention_slicing()
+        else:
+            pipe.unet.set_attn_processor(AttnProcessor2_0())
+        if self.compile_unet:
+            pipe.unet = torch.compile(pipe.unet)
+    
+    def describe(self) -> dict:
+        return {
+            "device": self.device,
+            "dtype": str(self.dtype).replace("torch.", ""),
+            "channels_last": self.channels_last,
+            "attention": self.attention,
+            "num_threads": self.num_threads or torch.get_num_threads(),
+            "torch_compile": self.compile_unet,
+            "backend": self.backend
+        }
+
+def select_inference_profile(device: str) -> InferenceProfile:
+    """Pick precision/kernels for ``device``.
+
+    GPU: fp16 with SDPA attention. CPU: fp16 kernels are missing or slow, so
+    use bf16 when the CPU has native support and fp32 otherwise, NHWC
+    (channels_last) convolutions, SDPA attention (sliced attention on small
+    hosts to bound peak memory) and one intra-op thread per available CPU.
+    The int8 backend (CPU only) needs fp32 activations, so it implies fp32.
+    """
+    if Config.INFERENCE_BACKEND not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{Config.INFERENCE_BACKEND}'. "
+                         f"Choose from: {', '.join(INFERENCE_BACKENDS)}")
+    backend = Config.INFERENCE_BACKEND if device == "cpu" else "eager"
+    
+    if Config.INFERENCE_DTYPE != "auto":
+        dtype = DTYPES[Config.INFERENCE_DTYPE]
+    elif device == "cuda":
+        dtype = torch.float16
+    elif backend == "int8":
+        dtype = torch.float32
+    elif cpu_supports_bf16():
+        dtype = torch.bfloat16
+    else:
+        dtype = torch.float32
+    
+    if device == "cuda":
+        return InferenceProfile(device, dtype, channels_last=False, attention="sdpa",
+                                num_threads=None, compile_unet=Config.TORCH_COMPILE)
+    
+    memory_gb = total_memory_gb()
+    small_host = memory_gb is not None and memory_gb < Config.ATTENTION_SLICING_BELOW_GB
+    return InferenceProfile(
+        device, dtype,
+        channels_last=True,
+        attention="sliced" if small_host else "sdpa",
+        num_threads=Config.CPU_THREADS or available_cpus(),
+        compile_unet=Config.TORCH_COMPILE,
+        backend=backend
+    )
+
+# ============================================================================
+# Model Loading
+# ============================================================================
+
+def local_model_path(model_id: str) -> str:
+    return os.path.join(Config.MODEL_CACHE_DIR, model_id.replace("/", "--"))
+
+def load_pipeline(pipeline_cls, model_id: str, **kwargs):
+    """Load a diffusers pipeline as fast as possible.
+
+    Order of preference:
+    1. ``Config.MODEL_CACHE_DIR/<model>``: safetensors only, memory-mapped,
+       no network access.
+    2. The Hugging Face cache, offline (skips the per-file metadata requests).
+    3. Download from the Hub.
+    """
+    local_path = local_model_path(model_id)
+    if os.path.isdir(local_path):
+        return pipeline_cls.from_pretrained(
+            local_path, use_safetensors=True, local_files_only=True, **kwargs
+        )
+    try:
+        return pipeline_cls.from_pretrained(model_id, local_files_only=True, **kwargs)
+    except (OSError, ValueError):
+        return pipeline_cls.from_pretrained(model_id, **kwargs)
+
+def prepare_model_cache():
+    """Save both pipelines to Config.MODEL_CACHE_DIR as safetensors"""
+    for pipeline_cls, model_id, dtype, kwargs in [
+        (StableDiffusionPipeline, Config.IMAGE_MODEL_ID, None, {}),
+        # Loaded as fp16 so the weights saved as the fp16 variant really are
+        (StableVideoDiffusionPipeline, Config.VIDEO_MODEL_ID, torch.float16, {"variant": "fp16"})
+    ]:
+        local_path = local_model_path(model_id)
+        print(f"Saving {model_id} to {local_path}...")
+        pipe = pipeline_cls.from_pretrained(model_id, torch_dtype=dtype, **kwargs)
+        pipe.save_pretrained(local_path, safe_serialization=True, **kwargs)
+        del pipe
+    print("✅ Model cache ready")
+
+# Components swapped for int8 versions by the int8 backend. Dynamic
+# quantization covers Linear layers: the UNet's attention and feed-forward
+# blocks (most of its FLOPs at SD resolutions) and the VAE's attention
+QUANTIZED_COMPONENTS = ("unet", "vae")
+
+def quantized_path(model_id: str, component: str) -> str:
+    # Pickled quantized modules are tied to the torch version that made them
+    version = torch.__version__.split("+")[0]
+    return os.path.join(local_model_path(model_id), "int8", f"{component}-torch{version}.pt")
+
+def quantize_pipeline(pipe, model_id: str):
+    """Replace the pipeline's UNet and VAE with dynamically int8-quantized ones.
+
+    Weights are quantized once and cached on disk; later loads unpickle the
+    quantized modules instead of re-quantizing.
+    """
+    for component in QUANTIZED_COMPONENTS:
+        path = quantized_path(model_id, component)
+        if os.path.exists(path):
+            module = torch.load(path, weights_only=False)
+        else:
+            start = time.perf_counter()
+            module = torch.ao.quantization.quantize_dynamic(
+                getattr(pipe, component), {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            torch.save(module, tmp)
+            os.replace(tmp, path)
+            print(f"Quantized {component} to int8 in {time.perf_counter() - start:.1f}s ({path})")
+        module.eval()
+        setattr(pipe, component, module)
+
+# ============================================================================
+# Conditioning Cache
+# ============================================================================
+
+class ConditioningCache:
+    """LRU cache of conditioning tensors bounded by total tensor size.
+
+    Used for prompt embeddings (the text encoder output only depends on the
+    prompt) and for SVD image conditioning (the CLIP embedding and VAE
+    latents of the input image do not depend on motion bucket or fps).
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key) -> Optional[torch.Tensor]:
+        with self.lock:
+            tensor = self.entries.get(key)
+            if tensor is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return tensor
+    
+    def put(self, key, tensor: torch.Tensor):
+        nbytes = tensor.element_size() * tensor.nelement()
+        if nbytes > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = tensor
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.element_size() * evicted.nelement()
+    
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "size_mb": round(self.size / (1024 * 1024), 1),
+                "hits": self.hits, "misses": self.misses}
 
 # ============================================================================
 # Image Generator
@@ -100,56 +815,333 @@ class JobStatus(BaseModel):
 class InteriorImageGenerator:
     def __init__(self):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.profile = select_inference_profile(self.device)
         self.pipe = None
+        self.load_lock = threading.Lock()
+        self.schedulers = {}  # sampler name -> scheduler instance (built once)
+        self.lcm_loaded = False
+        self.img2img = None
+        self.prompt_cache = ConditioningCache(Config.PROMPT_CACHE_MB * 1024 * 1024)
+        self.negative_embeds = None  # Unconditional ("") embedding, encoded once
+        # Schedulers are stateful, so one pipeline call at a time (the
+        # interactive lane and image-to-video jobs share this pipeline)
+        self.run_lock = threading.Lock()
         
     def load_model(self):
         """Load Stable Diffusion model"""
-        if self.pipe is None:
-            print(f"Loading image generation model on {self.device}...")
-            self.pipe = StableDiffusionPipeline.from_pretrained(
-                Config.IMAGE_MODEL_ID
+        with self.load_lock:
+            if self.pipe is not None:
+                return
+            start = time.perf_counter()
+            print(f"Loading image generation model on {self.device} "
+                  f"({self.profile.describe()})...")
+            self.profile.apply_threads()
+            pipe = load_pipeline(
+                StableDiffusionPipeline,
+                Config.IMAGE_MODEL_ID,
+                torch_dtype=self.profile.dtype
             )
-            self.pipe = self.pipe.to(self.device)
-            self.pipe = self.pipe.to(torch.float16)
-            print("Image model loaded!")
+            pipe = pipe.to(self.device)
+            self.schedulers["default"] = pipe.scheduler
+            if Config.LCM_LORA_ID:
+                # Kept as a switchable adapter, enabled only for the lcm sampler
+                pipe.load_lora_weights(Config.LCM_LORA_ID, adapter_name="lcm")
+                pipe.disable_lora()
+                self.lcm_loaded = True
+            if self.profile.backend == "int8":
+                if self.lcm_loaded:
+                    # PEFT LoRA layers read their Linear weights directly,
+                    # which quantized Linear layers do not expose
+                    print("⚠️ int8 backend does not support LoRA adapters; image model stays eager")
+                else:
+                    quantize_pipeline(pipe, Config.IMAGE_MODEL_ID)
+            self.profile.apply(pipe)
+            self.negative_embeds = self.encode_text(pipe, "")
+            if self.profile.compile_unet:
+                self.warm_up(pipe)
+            # Only publish the pipeline once it is fully set up
+            self.pipe = pipe
+            print(f"Image model loaded in {time.perf_counter() - start:.1f}s!")
+    
+    def unload(self):
+        """Drop the pipeline so its memory can be reclaimed (load_model reloads it)"""
+        with self.load_lock:
+            self.pipe = None
+            self.img2img = None
+            self.schedulers = {}
+            self.lcm_loaded = False
+            self.prompt_cache = ConditioningCache(Config.PROMPT_CACHE_MB * 1024 * 1024)
+    
+    def warm_up(self, pipe):
+        """Run a tiny generation so torch.compile traces before the first job"""
+        print("Warming up compiled UNet...")
+        pipe(prompt="interior design", num_inference_steps=2,
+                  height=512, width=512, output_type="latent")
+    
+    def use_sampler(self, name: str):
+        """Switch the pipeline's scheduler (instances are cached, so this is cheap)"""
+        if name not in self.schedulers:
+            scheduler_cls, extra_config = SAMPLERS[name]
+            self.schedulers[name] = scheduler_cls.from_config(
+                self.schedulers["default"].config, **extra_config
+            )
+        self.pipe.scheduler = self.schedulers[name]
+        if self.lcm_loaded:
+            if name == "lcm":
+                self.pipe.enable_lora()
+            else:
+                self.pipe.disable_lora()
+    
+    def img2img_pipe(self) -> StableDiffusionImg2ImgPipeline:
+        """img2img view of the loaded model (shares its weights, so no extra memory)"""
+        if self.img2img is None:
+            self.img2img = StableDiffusionImg2ImgPipeline(**self.pipe.components)
+        self.img2img.scheduler = self.pipe.scheduler
+        return self.img2img
+    
+    @staticmethod
+    def draft_size(width: int, height: int) -> tuple:
+        """Draft resolution: long side ``Config.DRAFT_SIZE``, multiples of 8"""
+        scale = min(1.0, Config.DRAFT_SIZE / max(width, height))
+        return (max(8, int(width * scale) // 8 * 8), max(8, int(height * scale) // 8 * 8))
+    
+    @staticmethod
+    def enhance_prompt(prompt: str) -> str:
+        return f"interior design, {prompt}, professional photography, 8k, detailed, high quality"
+    
+    def encode_text(self, pipe, text: str) -> torch.Tensor:
+        """CLIP text embedding ``[1, 77, dim]`` of one (already enhanced) prompt"""
+        with torch.inference_mode():
+            prompt_embeds, _ = pipe.encode_prompt(
+                text, self.device, num_images_per_prompt=1,
+                do_classifier_free_guidance=False
+            )
+        return prompt_embeds
+    
+    def prompt_embeddings(self, prompts: List[str]) -> dict:
+        """Pipeline kwargs with cached embeddings for ``prompts`` (enhanced here).
+
+        Repeated prompts skip the text encoder; the unconditional half for
+        guidance is the precomputed empty-prompt embedding.
+        """
+        embeds = []
+        for prompt in prompts:
+            text = self.enhance_prompt(prompt)
+            cached = self.prompt_cache.get(text)
+            if cached is None:
+                cached = self.encode_text(self.pipe, text)
+                self.prompt_cache.put(text, cached)
+            embeds.append(cached)
+        return {
+            "prompt_embeds": torch.cat(embeds),
+            "negative_prompt_embeds": self.negative_embeds.expand(len(prompts), -1, -1)
+        }
     
     def generate_image(self, prompt: str, output_path: str,
                       num_inference_steps: int = 20,
                       guidance_scale: float = 7.5,
                       width: int = 512,
-                      height: int = 512):
+                      height: int = 512,
+                      sampler: str = "default",
+                      progress: Optional[ProgressTracker] = None):
         """Generate interior design image"""
+        return self.generate_images(
+            [prompt], [output_path],
+            num_inference_steps=num_inference_steps,
+            guidance_scale=guidance_scale,
+            width=width,
+            height=height,
+            sampler=sampler,
+            progress=progress
+        )[0]
+    
+    def generate_images(self, prompts: List[str], output_paths: Optional[List[str]],
+                        num_inference_steps: int = 20,
+                        guidance_scale: float = 7.5,
+                        width: int = 512,
+                        height: int = 512,
+                        sampler: str = "default",
+                        progress: Optional[ProgressTracker] = None) -> List[dict]:
+        """Generate one image per prompt in a single batched pipeline call.
+
+        All prompts share size, steps and guidance scale, so the UNet runs
+        one batched forward pass per step instead of one pass per prompt.
+        With ``output_paths=None`` nothing is written; the caller gets the
+        PIL images in each result's ``"image"`` and saves them itself.
+        """
         self.load_model()
+        with self.run_lock:
+            return self._generate_images(prompts, output_paths, num_inference_steps,
+                                         guidance_scale, width, height, sampler,
+                                         progress or ProgressTracker())
+    
+    def _generate_images(self, prompts, output_paths, num_inference_steps,
+                         guidance_scale, width, height, sampler, progress) -> List[dict]:
+        self.use_sampler(sampler)
         
-        # Enhance prompt
-        enhanced_prompt = f"interior design, {prompt}, professional photography, 8k, detailed, high quality"
+        # Enhance and encode prompts (cached)
+        start = time.perf_counter()
+        embeddings = self.prompt_embeddings(prompts)
+        progress.add_timing("text_encode", time.perf_counter() - start)
         
-        # Generate image
-        image = self.pipe(
-            prompt=enhanced_prompt,
+        # Generate images
+        progress.begin_denoise(num_inference_steps)
+        images = self.pipe(
+            **embeddings,
             num_inference_steps=num_inference_steps,
             guidance_scale=guidance_scale,
             height=height,
-            width=width
-        ).images[0]
+            width=width,
+            callback_on_step_end=progress.on_step_end
+        ).images
+        progress.end_decode()
         
-        # Save image
-        image.save(output_path)
+        results = [
+            {
+                "image": image,
+                "width": width,
+                "height": height,
+                "batch_size": len(prompts),
+                "timings": progress.timings
+            }
+            for image in images
+        ]
+        if output_paths is None:
+            return results
         
-        return {
-            "width": width,
-            "height": height,
-            "file_size_mb": os.path.getsize(output_path) / (1024 * 1024)
-        }
+        # Save images
+        progress.begin_stage("encode")
+        for result, output_path in zip(results, output_paths):
+            result["image"].save(output_path)
+            result["file_size_mb"] = os.path.getsize(output_path) / (1024 * 1024)
+        progress.end_stage("encode")
+        
+        return results
+    
+    def refine_images(self, drafts: List[Image.Image], prompts: List[str],
+                      output_paths: List[str],
+                      num_inference_steps: int = 20,
+                      guidance_scale: float = 7.5,
+                      width: int = 512,
+                      height: int = 512,
+                      sampler: str = "default",
+                      strength: float = Config.REFINE_STRENGTH,
+                      progress: Optional[ProgressTracker] = None) -> List[dict]:
+        """Upscale draft images to ``width`` x ``height`` and refine them with img2img.
+
+        Only ``strength`` of the denoising schedule runs at full size; the
+        draft already fixes composition and colours.
+        """
+        self.load_model()
+        progress = progress or ProgressTracker()
+        
+        upscaled = [draft.resize((width, height), Image.Resampling.LANCZOS) for draft in drafts]
+        
+        # img2img skips the first (1 - strength) of the schedule
+        with self.run_lock:
+            self.use_sampler(sampler)
+            progress.begin_denoise(min(int(num_inference_steps * strength), num_inference_steps))
+            images = self.img2img_pipe()(
+                **self.prompt_embeddings(prompts),
+                image=upscaled,
+                strength=strength,
+                num_inference_steps=num_inference_steps,
+                guidance_scale=guidance_scale,
+                callback_on_step_end=progress.on_step_end
+            ).images
+            progress.end_decode()
+        
+        results = []
+        progress.begin_stage("encode")
+        for image, output_path in zip(images, output_paths):
+            image.save(output_path)
+            results.append({
+                "image": image,
+                "width": width,
+                "height": height,
+                "batch_size": len(prompts),
+                "timings": progress.timings,
+                "file_size_mb": os.path.getsize(output_path) / (1024 * 1024)
+            })
+        progress.end_stage("encode")
+        
+        return results
 
 # ============================================================================
 # Video Generator
 # ============================================================================
 
+# Fragmented MP4: the moov box comes first and media follows in self-contained
+# fragments, so a file that is still being written can already be streamed
+FRAGMENTED_MP4_FLAGS = ["-movflags", "frag_keyframe+empty_moov+default_base_moof"]
+
+def fragment_flags(fps: float) -> list:
+    """ffmpeg flags for a fragmented MP4 that is flushed while it is encoded.
+
+    A fragment is cut at every keyframe, and libx264's default keyframe
+    interval (250 frames) is longer than a whole clip, so keyframes are
+    forced every ``VIDEO_FRAGMENT_SECONDS``. The x264 lookahead is capped to
+    the same interval so frames are not held back much longer than that.
+    """
+    interval = max(1, round(fps * Config.VIDEO_FRAGMENT_SECONDS))
+    return FRAGMENTED_MP4_FLAGS + ["-g", str(interval), "-keyint_min", str(interval),
+                                   "-sc_threshold", "0", "-rc-lookahead", str(interval)]
+
+def open_video_writer(output_path: str, fps: float):
+    """Persistent ffmpeg writer that encodes frames as they are appended"""
+    return imageio.get_writer(
+        output_path,
+        fps=fps,
+        codec='libx264',
+        quality=9,
+        pixelformat='yuv420p',
+        ffmpeg_params=fragment_flags(fps)
+    )
+
+def has_media_fragment(path: str) -> bool:
+    """Whether a fragmented MP4 being written already holds a media fragment.
+
+    Walks the top-level boxes; the header (ftyp + empty moov) is written
+    first, media only arrives with the first ``moof``.
+    """
+    try:
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return False
+                size = int.from_bytes(header[:4], "big")
+                if header[4:] == b"moof":
+                    return True
+                if size == 1:
+                    size = int.from_bytes(f.read(8), "big") - 8
+                if size < 8:
+                    return False
+                f.seek(size - 8, os.SEEK_CUR)
+    except OSError:
+        return False
+
+def image_digest(image: Image.Image) -> str:
+    """Hash of a preprocessed image's pixels"""
+    digest = hashlib.sha256(image.tobytes())
+    digest.update(f"{image.mode}:{image.size}".encode())
+    return digest.hexdigest()
+
 class InteriorVideoGenerator:
     def __init__(self):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.profile = select_inference_profile(self.device)
         self.pipe = None
+        self.load_lock = threading.Lock()
+        self.conditioning_cache = ConditioningCache(Config.CONDITIONING_CACHE_MB * 1024 * 1024)
+        # Per-call state read by the pipeline hooks (key of the image being
+        # rendered, motion bucket per video in a multi-variant batch)
+        self.call_state = threading.local()
+        # One SVD call at a time (staged image-to-video jobs and plain video
+        # jobs can run on different threads)
+        self.run_lock = threading.Lock()
+        # The VAE is shared by SVD calls (image encode) and the decode stage
+        self.vae_lock = threading.Lock()
         
         self.room_settings = {
             "living_room": {"motion": 85, "frames": 14, "fps": 7},
@@ -170,20 +1162,99 @@ class InteriorVideoGenerator:
     
     def load_model(self):
         """Load Video Diffusion model"""
-        if self.pipe is None:
-            print(f"Loading video generation model on {self.device}...")
-            self.pipe = StableVideoDiffusionPipeline.from_pretrained(
+        with self.load_lock:
+            if self.pipe is not None:
+                return
+            start = time.perf_counter()
+            profile = self.profile
+            print(f"Loading video generation model on {self.device} "
+                  f"({profile.describe()['dtype']}, {profile.backend})...")
+            profile.apply_threads()
+            # fp16 weights are the smaller download; they are upcast on CPU
+            pipe = load_pipeline(
+                StableVideoDiffusionPipeline,
                 Config.VIDEO_MODEL_ID,
-                torch_dtype=torch.float16,
+                torch_dtype=profile.dtype,
                 variant="fp16"
             )
-            self.pipe.to(self.device)
-            print("Video model loaded!")
+            pipe.to(self.device)
+            if profile.backend == "int8":
+                quantize_pipeline(pipe, Config.VIDEO_MODEL_ID)
+            self.install_hooks(pipe)
+            self.pipe = pipe
+            print(f"Video model loaded in {time.perf_counter() - start:.1f}s!")
+    
+    def unload(self):
+        """Drop the pipeline so its memory can be reclaimed (load_model reloads it)"""
+        with self.load_lock:
+            self.pipe = None
+            self.conditioning_cache = ConditioningCache(Config.CONDITIONING_CACHE_MB * 1024 * 1024)
+    
+    def install_hooks(self, pipe):
+        """Wrap the pipeline's conditioning and time-id helpers.
+
+        Conditioning is cached unbatched and expanded per call, so a
+        single render and a multi-variant batch share the same entries.
+        """
+        def cached_encoder(kind, encode):
+            def wrapper(image, device, num_videos_per_prompt, do_classifier_free_guidance):
+                image_key = getattr(self.call_state, "image_key", None)
+                if image_key is None:
+                    return encode(image, device, num_videos_per_prompt,
+                                  do_classifier_free_guidance)
+                key = (kind, image_key)
+                base = self.conditioning_cache.get(key)
+                if base is None:
+                    base = encode(image, device, 1, False)
+                    self.conditioning_cache.put(key, base)
+                # Same expansion as the pipeline: per-video copies, then the
+                # zero (unconditional) half in front for guidance
+                result = base.repeat_interleave(num_videos_per_prompt, dim=0)
+                if do_classifier_free_guidance:
+                    result = torch.cat([torch.zeros_like(result), result])
+                return result
+            return wrapper
+        
+        get_add_time_ids = pipe._get_add_time_ids
+        
+        def add_time_ids_per_video(*args, **kwargs):
+            add_time_ids = get_add_time_ids(*args, **kwargs)
+            buckets = getattr(self.call_state, "motion_buckets", None)
+            if buckets:
+                # Rows are [uncond videos..., cond videos...] under guidance
+                column = torch.tensor(buckets, dtype=add_time_ids.dtype)
+                add_time_ids[:, 1] = column.repeat(add_time_ids.shape[0] // len(buckets))
+            return add_time_ids
+        
+        # The pipeline would upcast the fp16 VAE to fp32 around the image
+        # encode, changing its dtype under a concurrent decode. Do that here
+        # instead, under vae_lock
+        upcast_vae = pipe.vae.dtype == torch.float16 and pipe.vae.config.force_upcast
+        pipe.vae.register_to_config(force_upcast=False)
+        encode_vae_image = pipe._encode_vae_image
+        
+        def encode_vae_image_locked(image, *args):
+            with self.vae_lock:
+                if not upcast_vae:
+                    return encode_vae_image(image, *args)
+                pipe.vae.to(dtype=torch.float32)
+                try:
+                    return encode_vae_image(image.float(), *args)
+                finally:
+                    pipe.vae.to(dtype=torch.float16)
+        
+        pipe._encode_image = cached_encoder("clip", pipe._encode_image)
+        pipe._encode_vae_image = cached_encoder("vae", encode_vae_image_locked)
+        pipe._get_add_time_ids = add_time_ids_per_video
     
-    def preprocess_image(self, image_path: str, enhance_lighting: bool = True,
+    def preprocess_image(self, image: Union[str, Image.Image], enhance_lighting: bool = True,
                         adjust_contrast: bool = True, target_size: int = 384):
-        """Preprocess image for video generation"""
-        image = Image.open(image_path).convert("RGB")
+        """Preprocess image (file path or in-memory PIL image) for video generation"""
+        if isinstance(image, Image.Image):
+            image = image.convert("RGB")
+        else:
+            # Large JPEGs decode at a reduced scale instead of full resolution
+            image = open_image(image, (target_size, target_size)).convert("RGB")
         
         if enhance_lighting:
             enhancer = ImageEnhance.Brightness(image)
@@ -196,20 +1267,75 @@ class InteriorVideoGenerator:
         image = image.resize((target_size, target_size), Image.Resampling.LANCZOS)
         return image
     
-    def generate_video(self, image_path: str, output_path: str,
+    def generate_video(self, image_path: Union[str, Image.Image], output_path: str,
                       room_type: str = "living_room",
                       motion_style: str = "moderate",
                       enhance_lighting: bool = True,
-                      adjust_contrast: bool = True):
-        """Generate video from image"""
+                      adjust_contrast: bool = True,
+                      num_inference_steps: int = 10,
+                      progress: Optional[ProgressTracker] = None,
+                      on_stream_start: Optional[Callable[[], None]] = None,
+                      target_fps: Optional[int] = None,
+                      interpolation: str = "blend"):
+        """Generate video from image (``image_path`` may also be a PIL image).
+
+        The MP4 is written progressively as frames are decoded;
+        ``on_stream_start`` is called once its first fragment is on disk.
+        With ``target_fps`` above the room's frame rate, frames are
+        interpolated up to it before encoding.
+        """
+        progress = progress or ProgressTracker()
+        settings = self.room_settings.get(room_type, self.room_settings["living_room"])
+        
+        latents = self.render_latents(
+            image_path, room_type, [motion_style],
+            enhance_lighting, adjust_contrast, num_inference_steps, progress
+        )
+        result = self.write_video(latents[0], output_path, settings["fps"],
+                                  progress, on_stream_start,
+                                  target_fps=target_fps, interpolation=interpolation)
+        result["timings"] = progress.timings
+        return result
+    
+    def generate_variants(self, image_path: Union[str, Image.Image], output_paths: Dict[str, str],
+                          room_type: str = "living_room",
+                          enhance_lighting: bool = True,
+                          adjust_contrast: bool = True,
+                          num_inference_steps: int = 10,
+                          progress: Optional[ProgressTracker] = None,
+                          target_fps: Optional[int] = None,
+                          interpolation: str = "blend") -> Dict[str, dict]:
+        """Render one video per motion style (keys of ``output_paths``) in a
+        single batched SVD call sharing the image conditioning"""
+        progress = progress or ProgressTracker()
+        settings = self.room_settings.get(room_type, self.room_settings["living_room"])
+        motion_styles = list(output_paths)
+        
+        latents = self.render_latents(
+            image_path, room_type, motion_styles,
+            enhance_lighting, adjust_contrast, num_inference_steps, progress
+        )
+        results = {}
+        for index, motion_style in enumerate(motion_styles):
+            results[motion_style] = self.write_video(
+                latents[index], output_paths[motion_style], settings["fps"], progress,
+                target_fps=target_fps, interpolation=interpolation
+            )
+        return results
+    
+    def render_latents(self, image_path: Union[str, Image.Image], room_type: str,
+                       motion_styles: List[str], enhance_lighting: bool,
+                       adjust_contrast: bool, num_inference_steps: int,
+                       progress: ProgressTracker) -> torch.Tensor:
+        """Denoise one video per motion style; returns ``[videos, F, C, H, W]`` latents"""
         self.load_model()
         
         # Get settings
         settings = self.room_settings.get(room_type, self.room_settings["living_room"])
-        motion_adjust = self.motion_styles.get(motion_style, 0)
-        motion_bucket = min(255, max(0, settings["motion"] + motion_adjust))
-        num_frames = settings["frames"]
-        fps = settings["fps"]
+        motion_buckets = [
+            min(255, max(0, settings["motion"] + self.motion_styles.get(style, 0)))
+            for style in motion_styles
+        ]
         
         # Preprocess
         image = self.preprocess_image(
@@ -218,37 +1344,119 @@ class InteriorVideoGenerator:
             adjust_contrast=adjust_contrast
         )
         
-        # Clear cache
-        torch.cuda.empty_cache()
+        # Return cached blocks from earlier jobs to the CUDA allocator
+        if self.device == "cuda":
+            torch.cuda.empty_cache()
         
-        # Generate video
-        video_frames = self.pipe(
-            image,
-            num_frames=num_frames,
-            num_inference_steps=10, # Reduced for speed
-            motion_bucket_id=motion_bucket,
-            fps=fps,
-            decode_chunk_size=2,
-            generator=torch.manual_seed(42)
-        ).frames[0]
-        
-        # Save video
-        video_frames_np = [np.array(frame) for frame in video_frames]
-        imageio.mimsave(
-            output_path,
-            video_frames_np,
-            fps=fps,
-            codec='libx264',
-            quality=9,
-            pixelformat='yuv420p'
-        )
+        # Generate video latents (decoding happens in write_video, chunk by chunk)
+        self.run_lock.acquire()
+        self.call_state.image_key = image_digest(image)
+        self.call_state.motion_buckets = motion_buckets
+        try:
+            progress.begin_denoise(num_inference_steps)
+            return self.pipe(
+                image,
+                num_frames=settings["frames"],
+                num_inference_steps=num_inference_steps,
+                motion_bucket_id=motion_buckets[0],
+                fps=settings["fps"],
+                num_videos_per_prompt=len(motion_buckets),
+                generator=torch.manual_seed(42),
+                callback_on_step_end=progress.on_step_end,
+                output_type="latent"
+            ).frames
+        finally:
+            self.call_state.image_key = None
+            self.call_state.motion_buckets = None
+            self.run_lock.release()
+    
+    def write_video(self, latents: torch.Tensor, output_path: str, fps: float,
+                    progress: ProgressTracker,
+                    on_stream_start: Optional[Callable[[], None]] = None,
+                    target_fps: Optional[int] = None,
+                    interpolation: str = "blend") -> dict:
+        """Decode one video's latents ``[F, C, H, W]`` and encode it to MP4"""
+        # Decode and encode in lockstep: each decoded chunk goes straight to
+        # ffmpeg, so the full clip never sits in memory as frames
+        progress.begin_stage("decode_encode")
+        result = self.encode_video(self.decode_frames(latents, progress=progress), output_path,
+                                   fps, progress, on_stream_start,
+                                   target_fps=target_fps, interpolation=interpolation)
+        progress.end_stage("decode_encode")
+        return result
+    
+    def encode_video(self, chunks: Iterable[np.ndarray], output_path: str, fps: float,
+                     progress: ProgressTracker,
+                     on_stream_start: Optional[Callable[[], None]] = None,
+                     target_fps: Optional[int] = None,
+                     interpolation: str = "blend") -> dict:
+        """Interpolate and encode ``[chunk, H, W, 3]`` frame chunks to MP4 as they arrive"""
+        factor = interpolation_factor(fps, target_fps)
+        interpolator = FrameInterpolator(factor, interpolation)
+        fps = fps * factor
+        
+        frame_count = 0
+        with open_video_writer(output_path, fps) as writer:
+            for frames in chunks:
+                if factor > 1:
+                    start = time.perf_counter()
+                    frames = interpolator.push(frames)
+                    progress.add_timing("interpolate", time.perf_counter() - start)
+                start = time.perf_counter()
+                for frame in frames:
+                    writer.append_data(frame)
+                    frame_count += 1
+                progress.add_timing("encode", time.perf_counter() - start)
+                # Announce the stream only once playable media is on disk
+                if on_stream_start is not None and has_media_fragment(output_path):
+                    on_stream_start()
+                    on_stream_start = None
         
         return {
-            "frames": len(video_frames),
+            "frames": frame_count,
             "fps": fps,
-            "duration": len(video_frames) / fps,
+            "duration": frame_count / fps,
             "file_size_mb": os.path.getsize(output_path) / (1024 * 1024)
         }
+    
+    def decode_chunk_size(self, latents: torch.Tensor) -> int:
+        """Frames per VAE decode call that fit in currently free memory"""
+        free_gb = available_memory_gb(self.device)
+        if free_gb is None:
+            return 2
+        # latents are 1/8 of the image size per side
+        pixels = latents.shape[-2] * latents.shape[-1] * 64
+        per_frame_mb = Config.VAE_DECODE_MB_PER_FRAME * pixels / (384 * 384)
+        fits = int(free_gb * 1024 * Config.VAE_DECODE_MEMORY_SHARE / per_frame_mb)
+        return max(1, min(Config.MAX_DECODE_CHUNK, fits))
+    
+    @torch.inference_mode()
+    def decode_frames(self, latents: torch.Tensor, decode_chunk_size: Optional[int] = None,
+                      progress: Optional[ProgressTracker] = None):
+        """Decode one video's SVD latents ``[frames, C, H, W]`` a chunk at a time.
+
+        Yields uint8 ``[chunk, H, W, 3]`` arrays (same math as the
+        pipeline's own ``decode_latents``, in the VAE's dtype). The chunk
+        size adapts to free memory unless given. Only the VAE calls hold
+        ``vae_lock``, so decoding overlaps another job's UNet steps.
+        """
+        decode_chunk_size = decode_chunk_size or self.decode_chunk_size(latents)
+        if progress is not None:
+            progress.timings["decode_chunk_size"] = decode_chunk_size
+        vae = self.pipe.vae
+        latents = latents / vae.config.scaling_factor
+        
+        for i in range(0, latents.shape[0], decode_chunk_size):
+            check_cancelled()
+            start = time.perf_counter()
+            chunk = latents[i:i + decode_chunk_size]
+            with self.vae_lock:
+                frames = vae.decode(chunk.to(vae.dtype), num_frames=chunk.shape[0]).sample
+            frames = ((frames.float() / 2 + 0.5).clamp(0, 1) * 255).round()
+            frames = frames.to(torch.uint8).permute(0, 2, 3, 1).cpu().numpy()
+            if progress is not None:
+                progress.add_timing("vae_decode", time.perf_counter() - start)
+            yield frames
 
 # ============================================================================
 # FastAPI Application
@@ -260,6 +1468,12 @@ app = FastAPI(
     version="2.0.0"
 )
 
+# Oversized upload bodies are refused as they arrive, before FastAPI spools
+# them (64 KB allowance for the multipart framing and form fields). Added
+# before CORS so the 413 still carries the CORS headers.
+app.add_middleware(UploadSizeLimit, max_bytes=Config.MAX_FILE_SIZE + 64 * 1024,
+                   path_prefixes=("/api/v1/generate/video",))
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -269,59 +1483,216 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize generators
-image_generator = InteriorImageGenerator()
-video_generator = InteriorVideoGenerator()
-
-# Job tracking
-jobs = {}
-
 # Create directories
 for directory in [Config.UPLOAD_DIR, Config.OUTPUT_DIR, 
                   Config.GENERATED_IMAGES_DIR, Config.TEMP_DIR]:
     os.makedirs(directory, exist_ok=True)
 
+# Job tracking (persistent, shared by all API workers and the inference worker)
+job_store = JobStore(Config.JOB_DB_PATH)
+
+# Finished videos by content hash; the seed is fixed, so equal inputs give
+# equal outputs and a re-submitted image can be answered without running SVD
+video_cache = ResultCache(Config.RESULT_CACHE_DIR,
+                          Config.RESULT_CACHE_MAX_MB * 1024 * 1024, suffix=".mp4")
+
+# Uploaded images by content hash (hard links to the uploads), so a client
+# can refer to an image it sent before instead of uploading it again
+image_cache = ResultCache(Config.IMAGE_CACHE_DIR, Config.IMAGE_CACHE_MAX_MB * 1024 * 1024)
+
+video_profile = None
+
+def video_inference_profile() -> InferenceProfile:
+    """Profile the inference worker on this host renders videos with"""
+    global video_profile
+    if video_profile is None:
+        video_profile = select_inference_profile("cuda" if torch.cuda.is_available() else "cpu")
+    return video_profile
+
+def video_cache_key(image_hash: str, request: VideoGenerationRequest) -> str:
+    """Everything that determines the generated video"""
+    profile = video_inference_profile()
+    return content_key(
+        image=image_hash,
+        room_type=request.room_type,
+        motion_style=request.motion_style,
+        enhance_lighting=request.enhance_lighting,
+        adjust_contrast=request.adjust_contrast,
+        num_inference_steps=request.num_inference_steps,
+        target_fps=request.target_fps,
+        interpolation=request.interpolation if request.target_fps else None,
+        model=Config.VIDEO_MODEL_ID,
+        # Large JPEGs are decoded at reduced scale (draft mode) since this
+        # was added, which changes their pixels slightly
+        decode="draft",
+        # int8 and reduced-precision outputs differ from eager fp32 ones
+        backend=profile.backend,
+        dtype=str(profile.dtype).replace("torch.", "")
+    )
+
 # ============================================================================
-# Background Tasks
+# Job Processing (runs inside the inference worker process)
 # ============================================================================
 
-async def process_image_generation(job_id: str, request: ImageGenerationRequest):
-    """Generate image in background"""
+artifact_writers = {}  # pid -> executor (executors must not cross a fork)
+
+def get_artifact_writer() -> ThreadPoolExecutor:
+    """Thread pool that writes artifacts off the inference critical path"""
+    pid = os.getpid()
+    if pid not in artifact_writers:
+        artifact_writers[pid] = ThreadPoolExecutor(max_workers=2,
+                                                   thread_name_prefix="artifact-writer")
+    return artifact_writers[pid]
+
+def image_batch_key(request: ImageGenerationRequest) -> str:
+    """Requests with equal keys can share one batched pipeline call"""
+    return (f"image:{request.width}x{request.height}:{request.sampler}:"
+            f"{request.num_inference_steps}:{request.guidance_scale}"
+            f"{':draft' if request.draft else ''}")
+
+def image_batch_limit(width: int, height: int) -> int:
+    """Largest batch that fits the configured size and memory bounds"""
+    by_pixels = Config.IMAGE_BATCH_MAX_PIXELS // (width * height)
+    return max(1, min(Config.IMAGE_BATCH_MAX_SIZE, by_pixels))
+
+def process_image_batch(batch: List[tuple], image_generator: InteriorImageGenerator,
+                        update_job):
+    """Generate images for a batch of compatible ``(job_id, request)`` pairs"""
+    job_ids = [job_id for job_id, _ in batch]
+    
+    def report(**fields):
+        for job_id in job_ids:
+            update_job(job_id, **fields)
+    
     try:
-        jobs[job_id]["status"] = "processing"
-        jobs[job_id]["progress"] = 20
-        jobs[job_id]["message"] = "Generating image..."
+        message = "Generating image..."
+        if len(batch) > 1:
+            message = f"Generating image (batched with {len(batch) - 1} other job(s))..."
+        report(status="processing", progress=5, message=message)
         
-        output_filename = f"{job_id}.png"
-        output_path = os.path.join(Config.GENERATED_IMAGES_DIR, output_filename)
-        
-        result = image_generator.generate_image(
-            prompt=request.prompt,
-            output_path=output_path,
-            num_inference_steps=request.num_inference_steps,
-            guidance_scale=request.guidance_scale,
-            width=request.width,
-            height=request.height
+        first = batch[0][1]
+        previewer = LatentPreviewer(
+            [(index, job_id, request.preview_every)
+             for index, (job_id, request) in enumerate(batch) if request.preview_every],
+            get_artifact_writer(), update_job
         )
+        if first.draft and max(first.width, first.height) > Config.DRAFT_SIZE:
+            results = generate_drafted_images(batch, image_generator, report, update_job,
+                                              previewer)
+        else:
+            progress = ProgressTracker(report, start=5, end=95)
+            if previewer.targets:
+                progress.step_hooks.append(previewer)
+            results = image_generator.generate_images(
+                prompts=[request.prompt for _, request in batch],
+                output_paths=[
+                    os.path.join(Config.GENERATED_IMAGES_DIR, f"{job_id}.png")
+                    for job_id in job_ids
+                ],
+                num_inference_steps=first.num_inference_steps,
+                guidance_scale=first.guidance_scale,
+                width=first.width,
+                height=first.height,
+                sampler=first.sampler,
+                progress=progress
+            )
+        previewer.wait()
         
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["message"] = "Image generated successfully!"
-        jobs[job_id]["image_url"] = f"/api/v1/download/image/{job_id}"
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        for job_id, result in zip(job_ids, results):
+            update_job(job_id, status="completed", progress=100,
+                       message="Image generated successfully!",
+                       image_url=f"/api/v1/download/image/{job_id}",
+                       stage=None, eta_seconds=0, timings=result["timings"],
+                       batch_size=result["batch_size"],
+                       completed_at=datetime.now().isoformat())
         
     except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["message"] = f"Error: {str(e)}"
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        report(status="failed", message=f"Error: {str(e)}",
+               completed_at=datetime.now().isoformat())
 
-async def process_video_generation(job_id: str, image_path: str, 
-                                   request: VideoGenerationRequest):
-    """Generate video in background"""
+def preview_path(job_id: str) -> str:
+    return os.path.join(Config.GENERATED_IMAGES_DIR, f"{job_id}_preview.jpg")
+
+def save_preview(image: Image.Image, job_id: str, quality: int):
+    """Replace a job's preview atomically: clients may be downloading the old one"""
+    path = preview_path(job_id)
+    tmp = os.path.join(os.path.dirname(path), f".{job_id}.{uuid.uuid4().hex}.tmp")
+    try:
+        image.save(tmp, format="JPEG", quality=quality)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+def generate_drafted_images(batch: List[tuple], image_generator: InteriorImageGenerator,
+                            report, update_job,
+                            previewer: Optional[LatentPreviewer] = None) -> List[dict]:
+    """Two-tier generation: publish low-res drafts, then refine them to full size"""
+    job_ids = [job_id for job_id, _ in batch]
+    prompts = [request.prompt for _, request in batch]
+    first = batch[0][1]
+    
+    # Tier 1: few-step draft at reduced size, published as soon as it is saved
+    draft_preset = resolve_image_preset("preview")
+    draft_width, draft_height = image_generator.draft_size(first.width, first.height)
+    drafts = image_generator.generate_images(
+        prompts=prompts,
+        output_paths=None,
+        num_inference_steps=draft_preset["num_inference_steps"],
+        guidance_scale=draft_preset["guidance_scale"],
+        width=draft_width,
+        height=draft_height,
+        sampler=draft_preset["sampler"],
+        progress=ProgressTracker(report, start=5, end=30)
+    )
+    
+    def publish_draft(job_id, image):
+        save_preview(image.convert("RGB"), job_id, quality=85)
+        update_job(job_id, preview_url=f"/api/v1/download/preview/{job_id}",
+                   message="Draft ready, refining...")
+    
+    previews = [
+        get_artifact_writer().submit(publish_draft, job_id, draft["image"])
+        for job_id, draft in zip(job_ids, drafts)
+    ]
+    
+    # Tier 2: img2img refinement at the requested size (live previews, if
+    # requested, start after the draft so they do not replace it with noise)
+    refine_progress = ProgressTracker(report, start=30, end=95)
+    for preview in previews:
+        preview.result()
+    if previewer is not None and previewer.targets:
+        refine_progress.step_hooks.append(previewer)
+    results = image_generator.refine_images(
+        [draft["image"] for draft in drafts],
+        prompts,
+        output_paths=[
+            os.path.join(Config.GENERATED_IMAGES_DIR, f"{job_id}.png")
+            for job_id in job_ids
+        ],
+        num_inference_steps=first.num_inference_steps,
+        guidance_scale=first.guidance_scale,
+        width=first.width,
+        height=first.height,
+        sampler=first.sampler,
+        progress=refine_progress
+    )
+    for result, draft in zip(results, drafts):
+        result["timings"] = {
+            **{f"draft_{k}": v for k, v in draft["timings"].items()},
+            **{f"refine_{k}": v for k, v in result["timings"].items()}
+        }
+    return results
+
+def process_video_generation(job_id: str, image_path: str,
+                             request: VideoGenerationRequest,
+                             video_generator: InteriorVideoGenerator, update_job,
+                             cache_key: Optional[str] = None):
+    """Generate video (and add it to the result cache under ``cache_key``)"""
     try:
-        jobs[job_id]["status"] = "processing"
-        jobs[job_id]["progress"] = 20
-        jobs[job_id]["message"] = "Generating video..."
+        update_job(job_id, status="processing", progress=5,
+                   message="Generating video...")
+        progress = ProgressTracker(lambda **f: update_job(job_id, **f), start=5, end=95)
         
         output_filename = f"{job_id}.mp4"
         output_path = os.path.join(Config.OUTPUT_DIR, output_filename)
@@ -332,70 +1703,1095 @@ async def process_video_generation(job_id: str, image_path: str,
             room_type=request.room_type,
             motion_style=request.motion_style,
             enhance_lighting=request.enhance_lighting,
-            adjust_contrast=request.adjust_contrast
+            adjust_contrast=request.adjust_contrast,
+            num_inference_steps=request.num_inference_steps,
+            progress=progress,
+            target_fps=request.target_fps,
+            interpolation=request.interpolation,
+            on_stream_start=lambda: update_job(
+                job_id, video_url=f"/api/v1/download/video/{job_id}")
+        )
+        
+        update_job(job_id, status="completed", progress=100,
+                   message="Video generated successfully!",
+                   video_url=f"/api/v1/download/video/{job_id}",
+                   duration=result["duration"],
+                   frames=result["frames"],
+                   stage=None, eta_seconds=0, timings=result["timings"],
+                   completed_at=datetime.now().isoformat())
+        
+    except Exception as e:
+        update_job(job_id, status="failed", message=f"Error: {str(e)}",
+                   completed_at=datetime.now().isoformat())
+        return
+    
+    if cache_key:
+        try:
+            video_cache.put(cache_key, output_path, {
+                "frames": result["frames"],
+                "fps": result["fps"],
+                "duration": result["duration"]
+            })
+        except OSError as e:
+            print(f"⚠️ Could not cache video for job {job_id}: {e}")
+
+def process_video_variants(job_id: str, image_path: str, motion_styles: List[str],
+                           request: VideoGenerationRequest,
+                           video_generator: InteriorVideoGenerator, update_job):
+    """Render several motion styles of one image in a single batched call"""
+    try:
+        update_job(job_id, status="processing", progress=5,
+                   message=f"Generating {len(motion_styles)} video variants...")
+        progress = ProgressTracker(lambda **f: update_job(job_id, **f), start=5, end=95)
+        
+        output_paths = {
+            style: os.path.join(Config.OUTPUT_DIR, f"{job_id}_{style}.mp4")
+            for style in motion_styles
+        }
+        
+        results = video_generator.generate_variants(
+            image_path=image_path,
+            output_paths=output_paths,
+            room_type=request.room_type,
+            enhance_lighting=request.enhance_lighting,
+            adjust_contrast=request.adjust_contrast,
+            num_inference_steps=request.num_inference_steps,
+            progress=progress,
+            target_fps=request.target_fps,
+            interpolation=request.interpolation
         )
         
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["message"] = "Video generated successfully!"
-        jobs[job_id]["video_url"] = f"/api/v1/download/video/{job_id}"
-        jobs[job_id]["duration"] = result["duration"]
-        jobs[job_id]["frames"] = result["frames"]
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        variants = [
+            {
+                "motion_style": style,
+                "video_url": f"/api/v1/download/video/{job_id}_{style}",
+                "duration": result["duration"],
+                "frames": result["frames"]
+            }
+            for style, result in results.items()
+        ]
+        update_job(job_id, status="completed", progress=100,
+                   message="Video variants generated successfully!",
+                   variants=variants,
+                   stage=None, eta_seconds=0, timings=progress.timings,
+                   completed_at=datetime.now().isoformat())
         
     except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["message"] = f"Error: {str(e)}"
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        update_job(job_id, status="failed", message=f"Error: {str(e)}",
+                   completed_at=datetime.now().isoformat())
 
-async def process_image_to_video(job_id: str, request: ImageToVideoRequest):
-    """Generate image then video in background"""
+def process_image_to_video(job_id: str, request: ImageToVideoRequest,
+                           image_generator: InteriorImageGenerator,
+                           video_generator: InteriorVideoGenerator, update_job):
+    """Generate image then video"""
     try:
         # Step 1: Generate Image
-        jobs[job_id]["status"] = "processing"
-        jobs[job_id]["progress"] = 10
-        jobs[job_id]["message"] = "Step 1/2: Generating image..."
+        update_job(job_id, status="processing", progress=5,
+                   message="Step 1/2: Generating image...")
+        report = lambda **f: update_job(job_id, **f)
+        image_progress = ProgressTracker(report, start=5, end=45)
         
         image_filename = f"{job_id}_image.png"
         image_path = os.path.join(Config.GENERATED_IMAGES_DIR, image_filename)
         
-        image_generator.generate_image(
-            prompt=request.prompt,
-            output_path=image_path,
+        # Keep the image in memory for the video stage; the PNG is written
+        # concurrently instead of being encoded, then re-read and decoded
+        image_result = image_generator.generate_images(
+            prompts=[request.prompt],
+            output_paths=None,
             num_inference_steps=request.num_inference_steps,
             guidance_scale=request.guidance_scale,
             width=512,
-            height=512
-        )
+            height=512,
+            sampler=request.sampler,
+            progress=image_progress
+        )[0]
+        image = image_result["image"]
+        
+        def publish_image(future):
+            if future.exception() is None:
+                update_job(job_id, image_url=f"/api/v1/download/image/{job_id}_image")
         
-        jobs[job_id]["image_url"] = f"/api/v1/download/image/{job_id}_image"
+        image_saved = get_artifact_writer().submit(image.save, image_path)
+        image_saved.add_done_callback(publish_image)
         
         # Step 2: Generate Video
-        jobs[job_id]["progress"] = 50
-        jobs[job_id]["message"] = "Step 2/2: Generating video..."
+        update_job(job_id, progress=50,
+                   message="Step 2/2: Generating video...")
         
         video_filename = f"{job_id}.mp4"
         video_path = os.path.join(Config.OUTPUT_DIR, video_filename)
         
         result = video_generator.generate_video(
-            image_path=image_path,
+            image_path=image,
             output_path=video_path,
             room_type=request.room_type,
-            motion_style=request.motion_style
+            motion_style=request.motion_style,
+            num_inference_steps=request.video_steps,
+            progress=ProgressTracker(report, start=50, end=95),
+            target_fps=request.target_fps,
+            interpolation=request.interpolation,
+            on_stream_start=lambda: update_job(
+                job_id, video_url=f"/api/v1/download/video/{job_id}")
         )
         
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["message"] = "Image and video generated successfully!"
-        jobs[job_id]["video_url"] = f"/api/v1/download/video/{job_id}"
-        jobs[job_id]["duration"] = result["duration"]
-        jobs[job_id]["frames"] = result["frames"]
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        # Long finished by now; surfaces a failed PNG write
+        image_saved.result()
+        
+        timings = {f"image_{k}": v for k, v in image_result["timings"].items()}
+        timings.update({f"video_{k}": v for k, v in result["timings"].items()})
+        
+        update_job(job_id, status="completed", progress=100,
+                   message="Image and video generated successfully!",
+                   video_url=f"/api/v1/download/video/{job_id}",
+                   duration=result["duration"],
+                   frames=result["frames"],
+                   stage=None, eta_seconds=0, timings=timings,
+                   completed_at=datetime.now().isoformat())
         
     except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["message"] = f"Error: {str(e)}"
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        update_job(job_id, status="failed", message=f"Error: {str(e)}",
+                   completed_at=datetime.now().isoformat())
+
+# ============================================================================
+# Staged Image-to-Video Pipeline
+# ============================================================================
+
+def use_cpu_share(role: str):
+    """Limit this thread's torch intra-op threads to ``role``'s CPU share.
+
+    OpenMP thread counts are per calling thread, so every thread that runs
+    torch alongside others (lanes, stages) sets its own. No-op on GPU.
+    """
+    if torch.cuda.is_available():
+        return
+    total = Config.CPU_THREADS or available_cpus()
+    shares = Config.CPU_THREAD_SHARES
+    torch.set_num_threads(max(1, total * shares[role] // sum(shares.values())))
+
+# Stage -> CPU_THREAD_SHARES role (encode runs ffmpeg, not torch)
+STAGE_CPU_ROLES = {"image_unet": "image", "video_unet": "video", "vae_decode": "vae_decode"}
+
+IMAGE_TO_VIDEO_STAGES = ("image_unet", "video_unet", "vae_decode", "encode")
+
+class StagedJob:
+    """An image-to-video job moving through the stage pipeline"""
+    def __init__(self, job_id: str, request: ImageToVideoRequest, update_job,
+                 resources: ExitStack):
+        self.job_id = job_id
+        self.request = request
+        self.update_job = update_job
+        self.report = lambda **f: update_job(job_id, **f)
+        self.resources = resources  # Released once the job leaves the pipeline
+        self.image_result = None
+        self.image_saved = None
+        self.latents = None
+        self.frames = None  # Decoded chunks handed from vae_decode to encode
+        self.video_progress = ProgressTracker(self.report, start=50, end=95)
+        self.waits = {}
+        self.queued_at = None
+        self.failed = False
+        self.finished = False
+        self.lock = threading.Lock()  # decode and encode can fail concurrently
+
+class StagedImageToVideo:
+    """Runs image-to-video jobs as a pipeline of stages (see stage_pipeline.py).
+
+    Does the same work as ``process_image_to_video``, split at the points
+    where a job moves from one resource to the next. Stage queues are
+    bounded: the worker only claims another image-to-video job while the
+    first stage has room.
+    """
+    def __init__(self, image_generator: InteriorImageGenerator,
+                 video_generator: InteriorVideoGenerator, update_job):
+        self.image_generator = image_generator
+        self.video_generator = video_generator
+        self.update_job = update_job
+        self.pipeline = StagePipeline(IMAGE_TO_VIDEO_STAGES, queue_size=Config.STAGE_QUEUE_SIZE,
+                                      window=Config.STAGE_STATS_WINDOW,
+                                      initializer=self.init_stage_thread)
+    
+    @staticmethod
+    def init_stage_thread(stage: str):
+        if stage in STAGE_CPU_ROLES:
+            use_cpu_share(STAGE_CPU_ROLES[stage])
+    
+    def has_capacity(self) -> bool:
+        return self.pipeline.has_capacity()
+    
+    def submit(self, job: dict, resources: ExitStack):
+        """Start a claimed job; ``resources`` is closed when the job is done"""
+        payload = job_store.get_payload(job["job_id"]) or {}
+        staged = StagedJob(job["job_id"], ImageToVideoRequest(**payload["request"]),
+                           self.update_job, resources)
+        self.advance(staged, "image_unet", self.generate_image)
+    
+    def advance(self, job: StagedJob, stage: str, step: Callable[[StagedJob], None]):
+        job.queued_at = time.perf_counter()
+        self.pipeline.submit(stage, self.run_step, job, stage, step)
+    
+    def run_step(self, job: StagedJob, stage: str, step: Callable[[StagedJob], None]):
+        job.waits[stage] = round(time.perf_counter() - job.queued_at, 3)
+        try:
+            with cancellable([job.job_id]):
+                step(job)
+        except Exception as e:
+            self.fail(job, e)
+    
+    def generate_image(self, job: StagedJob):
+        request = job.request
+        job.report(status="processing", progress=5, message="Step 1/2: Generating image...")
+        job.image_result = self.image_generator.generate_images(
+            prompts=[request.prompt],
+            output_paths=None,
+            num_inference_steps=request.num_inference_steps,
+            guidance_scale=request.guidance_scale,
+            width=512,
+            height=512,
+            sampler=request.sampler,
+            progress=ProgressTracker(job.report, start=5, end=45)
+        )[0]
+        
+        def publish_image(future):
+            if future.exception() is None:
+                job.report(image_url=f"/api/v1/download/image/{job.job_id}_image")
+        
+        image_path = os.path.join(Config.GENERATED_IMAGES_DIR, f"{job.job_id}_image.png")
+        job.image_saved = get_artifact_writer().submit(job.image_result["image"].save, image_path)
+        job.image_saved.add_done_callback(publish_image)
+        job.report(progress=50, message="Step 2/2: Generating video...")
+        self.advance(job, "video_unet", self.render_video)
+    
+    def render_video(self, job: StagedJob):
+        request = job.request
+        job.latents = self.video_generator.render_latents(
+            job.image_result["image"], request.room_type, [request.motion_style],
+            True, True, request.video_steps, job.video_progress
+        )[0]
+        self.advance(job, "vae_decode", self.decode)
+    
+    def decode(self, job: StagedJob):
+        job.frames = queue.Queue(maxsize=Config.STAGE_FRAME_BUFFER)
+        self.advance(job, "encode", self.encode)
+        try:
+            for frames in self.video_generator.decode_frames(job.latents,
+                                                             progress=job.video_progress):
+                job.frames.put(frames)
+        except Exception as e:
+            # Passed on instead of the end marker, so encode cannot finish
+            # the truncated video as a completed job
+            job.frames.put(e)
+            raise
+        else:
+            job.frames.put(None)  # End of video
+        finally:
+            job.latents = None
+    
+    def encode(self, job: StagedJob):
+        ended = False
+        
+        def chunks():
+            nonlocal ended
+            while (frames := job.frames.get()) is not None:
+                if isinstance(frames, Exception):
+                    ended = True
+                    raise frames
+                yield frames
+            ended = True
+        
+        request = job.request
+        settings = self.video_generator.room_settings.get(
+            request.room_type, self.video_generator.room_settings["living_room"])
+        try:
+            result = self.video_generator.encode_video(
+                chunks(), os.path.join(Config.OUTPUT_DIR, f"{job.job_id}.mp4"),
+                settings["fps"], job.video_progress,
+                on_stream_start=lambda: job.report(
+                    video_url=f"/api/v1/download/video/{job.job_id}"),
+                target_fps=request.target_fps, interpolation=request.interpolation
+            )
+        except Exception:
+            # Unblock the decode stage, which may still be producing
+            while not ended and job.frames.get() is not None:
+                pass
+            raise
+        if job.failed:
+            return
+        
+        # Long finished by now; surfaces a failed PNG write
+        job.image_saved.result()
+        
+        timings = {f"image_{k}": v for k, v in job.image_result["timings"].items()}
+        timings.update({f"video_{k}": v for k, v in job.video_progress.timings.items()})
+        timings.update({f"wait_{stage}": wait for stage, wait in job.waits.items()})
+        job.report(status="completed", progress=100,
+                   message="Image and video generated successfully!",
+                   video_url=f"/api/v1/download/video/{job.job_id}",
+                   duration=result["duration"],
+                   frames=result["frames"],
+                   stage=None, eta_seconds=0, timings=timings,
+                   completed_at=datetime.now().isoformat())
+        self.finish(job)
+    
+    def fail(self, job: StagedJob, error: Exception):
+        job.failed = True
+        job.report(status="failed", message=f"Error: {str(error)}",
+                   completed_at=datetime.now().isoformat())
+        self.finish(job)
+    
+    def finish(self, job: StagedJob):
+        with job.lock:
+            if job.finished:
+                return
+            job.finished = True
+        job.image_result = None
+        job.resources.close()
+        job_store.set_state("stage_pipeline", self.pipeline.stats())
+
+# ============================================================================
+# Inference Worker
+# ============================================================================
+
+WORKER_LEASE = "inference-worker"
+
+# Models each job type needs before the worker may claim it
+JOB_TYPE_MODELS = {
+    "image": ("image",),
+    "video": ("video",),
+    "video-variants": ("video",),
+    "image-to-video": ("image", "video")
+}
+
+def module_bytes(pipe) -> int:
+    """Memory held by a pipeline's weights and buffers.
+
+    Dynamically quantized Linear layers (int8 backend) keep their packed
+    weights outside parameters and buffers, so those are counted separately.
+    """
+    total = 0
+    for component in pipe.components.values():
+        if isinstance(component, torch.nn.Module):
+            for tensor in list(component.parameters()) + list(component.buffers()):
+                total += tensor.numel() * tensor.element_size()
+            for module in component.modules():
+                packed = getattr(module, "_packed_params", None)
+                if hasattr(packed, "_weight_bias"):
+                    total += sum(tensor.numel() * tensor.element_size()
+                                 for tensor in packed._weight_bias() if tensor is not None)
+    return total
+
+class ModelResidency:
+    """Keeps the loaded pipelines within ``Config.MODEL_RAM_BUDGET_GB``.
+
+    Jobs run inside ``use(models)``, which loads what they need. When that
+    would exceed the budget, resident models not used by a running job are
+    unloaded first: those with the fewest queued jobs, then the least
+    recently used. If the models in use leave no room, ``use`` waits until
+    a job finishes, and workers only claim jobs whose models ``fit`` now.
+    A model that has loaded once stays available for scheduling while
+    unloaded; it is simply loaded again on demand. Loading happens outside
+    the residency lock, so it never blocks jobs using other models.
+    """
+    def __init__(self, generators: dict, budget_gb: float):
+        self.generators = generators
+        self.budget = budget_gb * 1024 ** 3
+        self.footprints = {}  # name -> measured bytes
+        self.last_used = {name: 0.0 for name in generators}
+        self.in_use = {name: 0 for name in generators}
+        self.available = set()  # models that loaded successfully at least once
+        self.lock = threading.RLock()
+        self.released = threading.Condition(self.lock)  # notified when a job ends
+        self.load_locks = {name: threading.Lock() for name in generators}
+    
+    def footprint(self, name: str) -> float:
+        return self.footprints.get(name, Config.MODEL_RAM_ESTIMATE_GB[name] * 1024 ** 3)
+    
+    def resident(self) -> List[str]:
+        return [name for name, generator in self.generators.items() if generator.pipe is not None]
+    
+    def committed(self) -> List[str]:
+        """Models resident or reserved by a running job (possibly still loading)"""
+        return [name for name in self.generators
+                if self.generators[name].pipe is not None or self.in_use[name]]
+    
+    def queue_demand(self, name: str) -> int:
+        """Queued jobs that need model ``name``"""
+        return sum(
+            job_store.list(status="queued", job_type=job_type, limit=1)[1]
+            for job_type, models in JOB_TYPE_MODELS.items() if name in models
+        )
+    
+    def fits(self, models) -> bool:
+        """Whether a job needing ``models`` can start now within the budget.
+
+        Models not used by a running job count as free (they can be
+        unloaded). With nothing running, any job fits, so a job whose
+        models exceed the budget on their own still runs, alone.
+        """
+        with self.lock:
+            pinned = [name for name in self.generators if self.in_use[name]]
+            if not pinned:
+                return True
+            needed = set(pinned) | set(models)
+            return sum(self.footprint(name) for name in needed) <= self.budget
+    
+    def load(self, name: str):
+        """Load ``name`` if it is not resident (callers reserve it via ``use``)"""
+        with self.load_locks[name]:
+            generator = self.generators[name]
+            if generator.pipe is None:
+                generator.load_model()
+                with self.lock:
+                    self.footprints[name] = module_bytes(generator.pipe)
+                    self.available.add(name)
+                job_store.set_state(f"{name}_model_resident", True)
+    
+    def make_room(self, models):
+        needed = set(models)
+        used = sum(self.footprint(name) for name in set(self.committed()) | needed)
+        while used > self.budget:
+            candidates = [name for name in self.resident()
+                          if name not in needed and self.in_use[name] == 0]
+            if not candidates:
+                print(f"⚠️ Model RAM budget exceeded: {used / 1024 ** 3:.1f} GB needed")
+                return
+            victim = min(candidates, key=lambda name: (self.queue_demand(name), self.last_used[name]))
+            used -= self.footprint(victim)
+            self.unload(victim)
+    
+    def unload(self, name: str):
+        print(f"Unloading {name} model to stay within the RAM budget")
+        self.generators[name].unload()
+        gc.collect()
+        job_store.set_state(f"{name}_model_resident", False)
+    
+    @contextmanager
+    def use(self, models):
+        """Keep ``models`` resident (loading them if needed) while a job runs"""
+        with self.lock:
+            while not self.fits(models):
+                self.released.wait()
+            self.make_room(models)
+            for name in models:
+                self.in_use[name] += 1
+                self.last_used[name] = time.monotonic()
+        try:
+            for name in models:
+                self.load(name)
+            yield
+        finally:
+            with self.lock:
+                for name in models:
+                    self.in_use[name] -= 1
+                    self.last_used[name] = time.monotonic()
+                self.released.notify_all()
+
+def load_models_in_background(generators: dict, residency: Optional[ModelResidency] = None):
+    """Load all pipelines concurrently, publishing per-model readiness.
+
+    ``generators`` maps a model name ("image", "video") to its generator.
+    Under a residency budget the loads go through it: a model loads once it
+    fits next to those in use, and only as many models as fit stay resident.
+    """
+    def load(name, generator):
+        try:
+            if residency is not None:
+                with residency.use((name,)):
+                    pass
+            else:
+                generator.load_model()
+            if hasattr(generator, "profile"):
+                job_store.set_state(f"{name}_profile", generator.profile.describe())
+            job_store.set_state(f"{name}_model_loaded", True)
+        except Exception as e:
+            print(f"❌ Failed to load {name} model: {e}")
+            job_store.set_state(f"{name}_model_error", str(e))
+    
+    for name, generator in generators.items():
+        job_store.set_state(f"{name}_model_loaded", False)
+        job_store.set_state(f"{name}_model_error", None)
+        threading.Thread(target=load, args=(name, generator),
+                         name=f"load-{name}-model", daemon=True).start()
+
+def ready_job_types(generators: dict, residency: Optional[ModelResidency] = None) -> List[str]:
+    """Job types whose required models are all loaded (or loadable on demand).
+
+    Under a residency budget, only job types whose models fit next to the
+    running jobs' ones: the others stay queued instead of overrunning it.
+    """
+    def ready(name):
+        if residency is not None:
+            return name in residency.available
+        return generators[name].pipe is not None
+    
+    return [
+        job_type for job_type, models in JOB_TYPE_MODELS.items()
+        if all(ready(name) for name in models)
+        and (residency is None or residency.fits(models))
+    ]
+
+def run_job(job: dict, image_generator: InteriorImageGenerator,
+            video_generator: InteriorVideoGenerator, update_job):
+    """Dispatch a claimed job to its processing function"""
+    job_id = job["job_id"]
+    payload = job_store.get_payload(job_id) or {}
+    
+    if job["job_type"] == "image":
+        process_image_batch(
+            [(job_id, ImageGenerationRequest(**payload["request"]))],
+            image_generator, update_job
+        )
+    elif job["job_type"] == "video":
+        process_video_generation(
+            job_id, payload["image_path"],
+            VideoGenerationRequest(**payload["request"]),
+            video_generator, update_job,
+            cache_key=payload.get("cache_key")
+        )
+    elif job["job_type"] == "video-variants":
+        process_video_variants(
+            job_id, payload["image_path"], payload["motion_styles"],
+            VideoGenerationRequest(**payload["request"]),
+            video_generator, update_job
+        )
+    elif job["job_type"] == "image-to-video":
+        process_image_to_video(
+            job_id, ImageToVideoRequest(**payload["request"]),
+            image_generator, video_generator, update_job
+        )
+    else:
+        update_job(job_id, status="failed",
+                   message=f"Error: unknown job type {job['job_type']}",
+                   completed_at=datetime.now().isoformat())
+
+def collect_image_batch(first_job: dict) -> List[tuple]:
+    """Claim queued image jobs compatible with ``first_job``.
+
+    Waits up to ``Config.IMAGE_BATCH_MAX_WAIT`` for more compatible jobs to
+    arrive, bounded by ``image_batch_limit`` and by the clients' fair share
+    (see ``JobStore.claim_batch``). Returns ``(job_id, request)``
+    pairs, ``first_job`` included.
+    """
+    request = ImageGenerationRequest(**job_store.get_payload(first_job["job_id"])["request"])
+    batch = [(first_job["job_id"], request)]
+    batch_key = job_store.get_batch_key(first_job["job_id"])
+    limit = image_batch_limit(request.width, request.height)
+    if batch_key is None:
+        return batch
+    
+    batch_clients = [first_job["client_id"]]
+    deadline = time.monotonic() + Config.IMAGE_BATCH_MAX_WAIT
+    while len(batch) < limit:
+        for job in job_store.claim_batch(batch_key, limit - len(batch), batch_clients):
+            batch_clients.append(job["client_id"])
+            payload = job_store.get_payload(job["job_id"])
+            batch.append((job["job_id"], ImageGenerationRequest(**payload["request"])))
+        if len(batch) >= limit or time.monotonic() >= deadline:
+            break
+        time.sleep(0.05)
+    return batch
+
+def update_running_job(job_id: str, **fields) -> bool:
+    """Worker-side job update; a cancelled or deleted job is left untouched"""
+    return job_store.transition(job_id, ("processing",), **fields)
+
+def remove_job_files(job_id: str):
+    for directory in [Config.UPLOAD_DIR, Config.OUTPUT_DIR, Config.GENERATED_IMAGES_DIR]:
+        for file in Path(directory).glob(f"{job_id}*"):
+            try:
+                file.unlink()
+            except OSError:
+                pass
+
+def release_cancelled(job_ids: List[str], device: str):
+    """Delete the outputs of jobs cancelled while running and free their memory"""
+    statuses = job_store.statuses(job_ids)
+    stopped = [job_id for job_id in job_ids if statuses.get(job_id, "cancelled") == "cancelled"]
+    if not stopped:
+        return
+    print(f"Stopped cancelled job(s): {', '.join(stopped)}")
+    for job_id in stopped:
+        remove_job_files(job_id)
+    gc.collect()
+    if device == "cuda":
+        torch.cuda.empty_cache()
+
+def cancel_abandoned_jobs():
+    if not Config.JOB_ABANDON_TIMEOUT:
+        return
+    abandoned = job_store.cancel_abandoned(Config.JOB_ABANDON_TIMEOUT)
+    if abandoned:
+        print(f"Cancelled {len(abandoned)} abandoned job(s)")
+
+def purge_old_jobs():
+    """Delete finished jobs past their retention period, with their files"""
+    if not Config.JOB_RETENTION_HOURS:
+        return
+    purged = job_store.purge(Config.JOB_RETENTION_HOURS * 3600)
+    for job_id in purged:
+        remove_job_files(job_id)
+    if purged:
+        print(f"Purged {len(purged)} old job(s)")
+
+def worker_loop(generators: dict, parent_pid: Optional[int] = None,
+                residency: Optional[ModelResidency] = None,
+                lane_job_types: Optional[tuple] = None,
+                exclude_job_types: tuple = (),
+                staged: Optional[StagedImageToVideo] = None,
+                cpu_share: Optional[str] = None):
+    """Claim and run jobs forever (one inference process).
+
+    A forked process passes ``parent_pid`` and exits once its supervisor is
+    gone, so no orphaned process keeps claiming jobs. ``lane_job_types`` /
+    ``exclude_job_types`` restrict which job types this loop claims. With
+    ``staged``, image-to-video jobs are handed to the stage pipeline and
+    the loop goes on claiming. ``cpu_share`` is the ``CPU_THREAD_SHARES``
+    role of this loop's thread when other threads run torch alongside it.
+    """
+    if cpu_share is not None:
+        use_cpu_share(cpu_share)
+    while True:
+        if parent_pid is not None and os.getppid() != parent_pid:
+            return
+        job_types = [
+            job_type for job_type in ready_job_types(generators, residency)
+            if (lane_job_types is None or job_type in lane_job_types)
+            and job_type not in exclude_job_types
+            and not (job_type == "image-to-video" and staged and not staged.has_capacity())
+        ]
+        job = job_store.claim_next(job_types) if job_types else None
+        if job is None:
+            time.sleep(Config.WORKER_POLL_INTERVAL)
+            continue
+        models = JOB_TYPE_MODELS.get(job["job_type"], ())
+        if job["job_type"] == "image-to-video" and staged is not None:
+            resources = ExitStack()
+            if residency is not None:
+                resources.enter_context(residency.use(models))
+            resources.callback(release_cancelled, [job["job_id"]], generators["image"].device)
+            staged.submit(job, resources)
+            continue
+        with residency.use(models) if residency is not None else nullcontext():
+            # A cancelled job stops at its next denoising step / decode chunk:
+            # JobCancelled surfaces as a failure, which update_running_job
+            # drops because the job is no longer "processing"
+            if job["job_type"] == "image":
+                batch = collect_image_batch(job)
+                job_ids = [job_id for job_id, _ in batch]
+                with cancellable(job_ids):
+                    process_image_batch(batch, generators["image"], update_running_job)
+            else:
+                job_ids = [job["job_id"]]
+                with cancellable(job_ids):
+                    run_job(job, generators["image"], generators["video"],
+                            update_running_job)
+        release_cancelled(job_ids, generators["image"].device)
+
+def forked_worker_loop(generators: dict, num_threads: int, parent_pid: int):
+    """Entry point of a pre-forked inference process"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    torch.set_num_threads(num_threads)
+    worker_loop(generators, parent_pid)
+
+def run_preforked_workers(generators: dict, processes: int):
+    """Fork ``processes`` inference processes sharing the loaded weights.
+
+    The models must be fully loaded first so every child inherits them; the
+    parent then only supervises (re-forks dead children) and publishes
+    memory accounting showing the copy-on-write sharing.
+    """
+    for generator in generators.values():
+        generator.load_model()
+    freeze_heap()
+    
+    num_threads = max(1, available_cpus() // processes)
+    parent_pid = os.getpid()
+    children = [
+        fork_process(forked_worker_loop, generators, num_threads, parent_pid,
+                     name=f"inference-{i}")
+        for i in range(processes)
+    ]
+    print(f"✅ Inference worker ready: {processes} processes x {num_threads} threads")
+    
+    while True:
+        time.sleep(Config.MEMORY_REPORT_INTERVAL)
+        for i, child in enumerate(children):
+            if not child.is_alive():
+                print(f"Inference process {child.pid} exited ({child.exitcode}), restarting")
+                children[i] = fork_process(forked_worker_loop, generators, num_threads,
+                                           parent_pid, name=f"inference-{i}")
+        job_store.set_state(
+            "inference_memory",
+            memory_report([os.getpid()] + [child.pid for child in children])
+        )
+
+def inference_worker_main():
+    """Entry point of the inference worker process.
+
+    Owns the diffusion pipelines, claims queued jobs from the job store and
+    runs them. Only one worker runs at a time: it must hold the store lease,
+    so extra workers started by other API processes exit. With
+    ``Config.INFERENCE_PROCESSES > 1`` (CPU only) it forks that many
+    inference processes after loading the models.
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    if not job_store.acquire_lease(WORKER_LEASE, owner, Config.WORKER_LEASE_TTL):
+        print("Inference worker: another worker holds the lease, exiting")
+        return
+    
+    # Exit through the finally block below (releases the lease and lets
+    # multiprocessing terminate forked children) when stopped with SIGTERM
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    def heartbeat():
+        while True:
+            time.sleep(Config.WORKER_LEASE_TTL / 3)
+            job_store.acquire_lease(WORKER_LEASE, owner, Config.WORKER_LEASE_TTL)
+            cancel_abandoned_jobs()
+            purge_old_jobs()
+    
+    threading.Thread(target=heartbeat, name="worker-heartbeat", daemon=True).start()
+    
+    requeued = job_store.requeue_interrupted()
+    if requeued:
+        print(f"Inference worker: re-queued {requeued} interrupted job(s)")
+    
+    image_generator = InteriorImageGenerator()
+    video_generator = InteriorVideoGenerator()
+    generators = {"image": image_generator, "video": video_generator}
+    
+    # CUDA contexts cannot be forked, so GPU hosts always use one process
+    processes = Config.INFERENCE_PROCESSES if image_generator.device == "cpu" else 1
+    preforked = processes > 1 and fork_supported()
+    
+    # Pre-forked processes share weights loaded by the parent, which must
+    # keep them all resident, so the RAM budget only applies to one process
+    residency = None
+    if Config.MODEL_RAM_BUDGET_GB and not preforked:
+        residency = ModelResidency(generators, Config.MODEL_RAM_BUDGET_GB)
+    
+    # Jobs for a model are served as soon as that model is up
+    print("Inference worker: loading models in the background...")
+    load_models_in_background(generators, residency)
+    
+    try:
+        if preforked:
+            run_preforked_workers(generators, processes)
+        else:
+            # Pre-forked processes already overlap jobs across processes
+            staged = None
+            if Config.STAGED_IMAGE_TO_VIDEO:
+                staged = StagedImageToVideo(image_generator, video_generator,
+                                            update_running_job)
+            if Config.INTERACTIVE_LANE:
+                threading.Thread(
+                    target=worker_loop, args=(generators,),
+                    kwargs={"residency": residency,
+                            "lane_job_types": Config.INTERACTIVE_JOB_TYPES,
+                            "cpu_share": "image"},
+                    name="interactive-lane", daemon=True
+                ).start()
+                worker_loop(generators, residency=residency,
+                            exclude_job_types=Config.INTERACTIVE_JOB_TYPES, staged=staged,
+                            cpu_share="video")
+            else:
+                worker_loop(generators, residency=residency, staged=staged,
+                            cpu_share="video" if staged else None)
+    finally:
+        job_store.release_lease(WORKER_LEASE, owner)
+
+def benchmark_samplers(prompt: str = "modern living room, beige sofa, large windows"):
+    """Time every image preset on this host with a fixed seed.
+
+    Writes one PNG per preset to Config.TEMP_DIR for side-by-side quality
+    comparison and prints seconds per image, to keep SAMPLER_BENCHMARKS and
+    IMAGE_PRESETS honest for this model and hardware.
+    """
+    generator = InteriorImageGenerator()
+    generator.load_model()
+    print(f"{'preset':<10} {'sampler':<8} {'steps':>5} {'seconds':>8}")
+    for name in IMAGE_PRESETS:
+        preset = resolve_image_preset(name)
+        torch.manual_seed(0)
+        start = time.perf_counter()
+        generator.generate_image(
+            prompt,
+            os.path.join(Config.TEMP_DIR, f"benchmark_{name}.png"),
+            num_inference_steps=preset["num_inference_steps"],
+            guidance_scale=preset["guidance_scale"],
+            sampler=preset["sampler"]
+        )
+        elapsed = time.perf_counter() - start
+        print(f"{name:<10} {preset['sampler']:<8} {preset['num_inference_steps']:>5} {elapsed:>8.1f}")
+
+def psnr(a: np.ndarray, b: np.ndarray) -> float:
+    mse = float(np.mean((a - b) ** 2))
+    return float("inf") if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+def check_backend(prompt: str = "modern living room, beige sofa, large windows",
+                  seeds=(0, 1, 2), steps: int = 12, video_steps: int = 10) -> bool:
+    """Compare the configured backend with eager output on fixed seeds.
+
+    Renders each seed with the eager pipeline, converts it to the configured
+    backend in place, renders again and reports PSNR and timing. The same is
+    done for the video model (its render uses a fixed seed), animating the
+    first eager image. Images and first video frames are written to
+    Config.TEMP_DIR. Passes if every PSNR reaches Config.BACKEND_MIN_PSNR.
+    """
+    backend = Config.INFERENCE_BACKEND
+    if backend == "eager":
+        print("INFERENCE_BACKEND is eager; nothing to compare")
+        return True
+    
+    generator = InteriorImageGenerator()
+    generator.profile.backend = "eager"
+    generator.load_model()
+    
+    def render(tag):
+        images, seconds = [], 0.0
+        for seed in seeds:
+            torch.manual_seed(seed)
+            start = time.perf_counter()
+            image = generator.generate_images([prompt], None, num_inference_steps=steps)[0]["image"]
+            seconds += time.perf_counter() - start
+            image.save(os.path.join(Config.TEMP_DIR, f"backend_{tag}_seed{seed}.png"))
+            images.append(np.asarray(image, dtype=np.float32))
+        return images, seconds / len(seeds)
+    
+    reference, eager_seconds = render("eager")
+    quantize_pipeline(generator.pipe, Config.IMAGE_MODEL_ID)
+    candidate, backend_seconds = render(backend)
+    source_image = Image.fromarray(reference[0].astype(np.uint8))
+    generator.unload()
+    gc.collect()
+    
+    passed = True
+    print(f"{'seed':>4} {'psnr_db':>8} {'mean_abs':>8}")
+    for seed, a, b in zip(seeds, reference, candidate):
+        score = psnr(a, b)
+        passed = passed and score >= Config.BACKEND_MIN_PSNR
+        print(f"{seed:>4} {score:>8.2f} {float(np.mean(np.abs(a - b))):>8.2f}")
+    print(f"eager {eager_seconds:.1f}s/image, {backend} {backend_seconds:.1f}s/image "
+          f"({eager_seconds / backend_seconds:.2f}x)")
+    
+    video_generator = InteriorVideoGenerator()
+    video_generator.profile.backend = "eager"
+    video_generator.load_model()
+    
+    def render_video(tag):
+        # Fresh conditioning cache: the VAE that encodes the image changes too
+        video_generator.conditioning_cache = ConditioningCache(
+            Config.CONDITIONING_CACHE_MB * 1024 * 1024)
+        start = time.perf_counter()
+        latents = video_generator.render_latents(source_image, "living_room", ["moderate"],
+                                                 True, True, video_steps, ProgressTracker())
+        frames = np.concatenate(list(video_generator.decode_frames(latents[0])))
+        seconds = time.perf_counter() - start
+        Image.fromarray(frames[0]).save(os.path.join(Config.TEMP_DIR, f"backend_{tag}_video.png"))
+        return frames.astype(np.float32), seconds
+    
+    reference_video, eager_seconds = render_video("eager")
+    quantize_pipeline(video_generator.pipe, Config.VIDEO_MODEL_ID)
+    candidate_video, backend_seconds = render_video(backend)
+    
+    score = psnr(reference_video, candidate_video)
+    passed = passed and score >= Config.BACKEND_MIN_PSNR
+    print(f"video {score:.2f} dB over {len(reference_video)} frames; eager {eager_seconds:.1f}s, "
+          f"{backend} {backend_seconds:.1f}s ({eager_seconds / backend_seconds:.2f}x)")
+    print(f"{'✅ PASS' if passed else '❌ FAIL'} (threshold {Config.BACKEND_MIN_PSNR} dB)")
+    return passed
+
+class InferenceWorker:
+    """Handle to the inference worker process, used from the API process"""
+    def __init__(self):
+        self.ctx = multiprocessing.get_context("spawn")
+        self.process = None
+    
+    def lease_is_free(self) -> bool:
+        lease = job_store.get_state(f"lease:{WORKER_LEASE}")
+        return lease is None or lease["expires_at"] < time.time()
+    
+    def start(self):
+        """Start a worker process unless another one already holds the lease"""
+        if self.is_alive() or not self.lease_is_free():
+            return
+        # Not a daemon: daemonic processes may not fork the pre-forked
+        # inference processes. stop() terminates it on API shutdown.
+        self.process = self.ctx.Process(
+            target=inference_worker_main,
+            name="inference-worker"
+        )
+        self.process.start()
+    
+    def stop(self):
+        if self.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+    
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+    
+    async def supervise(self, interval: float = 10.0):
+        """Restart the worker if no live worker holds the lease"""
+        while True:
+            await asyncio.sleep(interval)
+            await run_in_threadpool(self.start)
+
+inference_worker = InferenceWorker()
+
+# ============================================================================
+# Scheduling (admission control and start time estimates)
+# ============================================================================
+
+def client_id_of(http_request: Request) -> str:
+    """Client identity for fair share: X-Client-ID header, else the peer address"""
+    client_id = http_request.headers.get("X-Client-ID")
+    if client_id:
+        return client_id[:64]
+    return http_request.client.host if http_request.client else "unknown"
+
+duration_stats = {}  # job_type -> (measured_at, seconds or None)
+
+def expected_duration(job_type: str) -> float:
+    """Seconds a job of this type takes, from recent completed jobs.
+
+    Read on every status poll, so the measurement is reused for
+    ``Config.DURATION_STATS_TTL`` seconds.
+    """
+    now = time.monotonic()
+    cached = duration_stats.get(job_type)
+    if cached is None or now - cached[0] > Config.DURATION_STATS_TTL:
+        cached = (now, job_store.average_duration(job_type))
+        duration_stats[job_type] = cached
+    measured = cached[1]
+    return measured if measured else Config.DEFAULT_JOB_SECONDS.get(job_type, 60)
+
+def worker_slots() -> int:
+    return Config.INFERENCE_PROCESSES if Config.INFERENCE_PROCESSES > 1 else 1
+
+def create_job(job_id: str, job_type: str, client_id: str, admit: bool = True,
+               **kwargs) -> dict:
+    """Insert a job. With ``admit``, the client's quota and the queue limit
+    are checked in the same transaction; a full one raises 429 with a
+    Retry-After estimate. Jobs answered from the cache skip admission."""
+    limits = {}
+    if admit:
+        limits = {"max_client_active": Config.CLIENT_MAX_ACTIVE_JOBS,
+                  "max_queued": Config.QUEUE_LIMITS.get(job_type, 50)}
+    try:
+        return job_store.create(job_id, job_type, client_id=client_id,
+                                priority=Config.JOB_PRIORITIES.get(job_type, 0),
+                                **limits, **kwargs)
+    except AdmissionRefused as e:
+        if e.limit == "client":
+            detail = f"Too many active jobs for this client ({e.count}); retry later"
+            retry_after = expected_duration(job_type)
+        else:
+            detail = f"The {job_type} queue is full ({e.count} jobs); retry later"
+            # Time for the worker to drain enough of this queue to fit one more
+            retry_after = expected_duration(job_type) / worker_slots()
+        raise HTTPException(429, detail, headers={"Retry-After": str(int(retry_after) + 1)})
+
+def estimate_start(job: dict) -> Optional[str]:
+    """Approximate start time of a queued job.
+
+    Counts the work queued ahead of it (higher priority, or same priority
+    and older) plus the remaining time of running jobs, spread over the
+    worker's slots. Fair sharing between clients can move it either way.
+    """
+    if job["status"] != "queued":
+        return None
+    now = datetime.now()
+    pending = sum(count * expected_duration(job_type)
+                  for job_type, count in job_store.queued_ahead(job).items())
+    for running in job_store.processing():
+        started = datetime.fromisoformat(running["started_at"]) if running.get("started_at") else now
+        elapsed = (now - started).total_seconds()
+        pending += max(0.0, expected_duration(running["job_type"]) - elapsed)
+    slots = worker_slots()
+    if Config.INTERACTIVE_LANE and slots == 1 and job["job_type"] in Config.INTERACTIVE_JOB_TYPES:
+        # The interactive lane only waits for other interactive jobs
+        pending = sum(count * expected_duration(job_type)
+                      for job_type, count in job_store.queued_ahead(job).items()
+                      if job_type in Config.INTERACTIVE_JOB_TYPES)
+    return datetime.fromtimestamp(now.timestamp() + pending / slots).isoformat()
+
+def job_status(job: dict) -> JobStatus:
+    return JobStatus(**job, estimated_start=estimate_start(job))
+
+def store_upload(file: UploadFile, job_id: str) -> StoredUpload:
+    """Stream an uploaded image to the upload dir, hashing it on the way"""
+    try:
+        return save_upload(file.file, Config.UPLOAD_DIR, job_id, Config.MAX_FILE_SIZE,
+                           allowed_extensions=Config.ALLOWED_EXTENSIONS,
+                           max_pixels=Config.MAX_IMAGE_PIXELS,
+                           chunk_size=Config.VIDEO_STREAM_CHUNK)
+    except UploadError as e:
+        raise HTTPException(e.status_code, str(e))
+
+IMAGE_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png"}
+
+def generated_image_path(job: dict) -> Optional[str]:
+    """Stored image of a completed image job (or of an image-to-video job's first step)"""
+    if job["job_type"] == "image" and job["status"] == "completed":
+        name = f"{job['job_id']}.png"
+    elif job["job_type"] == "image-to-video" and job.get("image_url"):
+        name = f"{job['job_id']}_image.png"
+    else:
+        return None
+    path = os.path.join(Config.GENERATED_IMAGES_DIR, name)
+    return path if os.path.exists(path) else None
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(Config.VIDEO_STREAM_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def video_input(job_id: str, file: Optional[UploadFile], image_job_id: Optional[str],
+                image_hash: Optional[str]) -> Tuple[str, str]:
+    """Input image of a video job as ``(path, sha256)``.
+
+    Either an upload, or a reference to an image already on the server: a
+    generated image (``image_job_id``) or an earlier upload's SHA-256
+    (``image_hash``). A reference skips the transfer, copy and validation
+    of an upload; it is hard-linked into the upload dir so the job keeps
+    its input even if the source is deleted or evicted.
+    """
+    if sum(source is not None for source in (file, image_job_id, image_hash)) != 1:
+        raise HTTPException(422, "Send exactly one of file, image_job_id or image_hash")
+    
+    if file is not None:
+        upload = store_upload(file, job_id)
+        try:
+            image_cache.put(upload.sha256, upload.path, {"format": upload.format})
+        except OSError as e:
+            print(f"⚠️ Could not cache uploaded image for job {job_id}: {e}")
+        return upload.path, upload.sha256
+    
+    if image_hash is not None:
+        image_hash = image_hash.lower()
+        if not re.fullmatch(r"[0-9a-f]{64}", image_hash):
+            raise HTTPException(422, "image_hash must be a SHA-256 hex digest")
+        cached = image_cache.get(image_hash)
+        if cached is None:
+            raise HTTPException(404, "No stored image with this hash; upload the file instead")
+        source, sha256 = cached["path"], image_hash
+        extension = IMAGE_EXTENSIONS.get(cached.get("format"), "")
+    else:
+        job = job_store.get(image_job_id)
+        source = generated_image_path(job) if job is not None else None
+        if source is None:
+            raise HTTPException(404, "No generated image for this job")
+        sha256, extension = file_sha256(source), ".png"
+    
+    path = os.path.join(Config.UPLOAD_DIR, f"{job_id}{extension}")
+    try:
+        link_or_copy(source, path)
+    except OSError:
+        raise HTTPException(404, "The referenced image is no longer available")
+    return path, sha256
 
 # ============================================================================
 # API Endpoints
@@ -411,13 +2807,29 @@ async def root():
         "endpoints": {
             "generate_image": "/api/v1/generate/image",
             "generate_video": "/api/v1/generate/video",
+            "generate_video_variants": "/api/v1/generate/video/variants",
             "image_to_video": "/api/v1/generate/image-to-video",
             "status": "/api/v1/status/{job_id}",
+            "events": "/api/v1/events/{job_id}",
+            "events_websocket": "/api/v1/ws",
             "download_image": "/api/v1/download/image/{job_id}",
-            "download_video": "/api/v1/download/video/{job_id}"
+            "download_video": "/api/v1/download/video/{job_id}",
+            "download_preview": "/api/v1/download/preview/{job_id}"
         }
     }
 
+def worker_state() -> dict:
+    """State published by the inference worker in the job store"""
+    return {
+        "worker_alive": not inference_worker.lease_is_free(),
+        "image_model_loaded": job_store.get_state("image_model_loaded", False),
+        "video_model_loaded": job_store.get_state("video_model_loaded", False),
+        "image_profile": job_store.get_state("image_profile"),
+        "inference_memory": job_store.get_state("inference_memory"),
+        "video_cache": video_cache.stats(),
+        "stage_pipeline": job_store.get_state("stage_pipeline")
+    }
+
 @app.get("/health")
 async def health_check():
     """Health check"""
@@ -425,29 +2837,63 @@ async def health_check():
         "status": "healthy",
         "device": "cuda" if torch.cuda.is_available() else "cpu",
         "gpu_name": torch.cuda.get_device_name(0) if torch.cuda.is_available() else "No GPU",
-        "image_model_loaded": image_generator.pipe is not None,
-        "video_model_loaded": video_generator.pipe is not None,
+        **(await run_in_threadpool(worker_state)),
         "timestamp": datetime.now().isoformat()
     }
 
+def model_readiness() -> dict:
+    """Per-model readiness as published by the inference worker"""
+    return {
+        name: {
+            "loaded": job_store.get_state(f"{name}_model_loaded", False),
+            "resident": job_store.get_state(f"{name}_model_resident"),
+            "error": job_store.get_state(f"{name}_model_error")
+        }
+        for name in ("image", "video")
+    }
+
+@app.get("/api/v1/presets")
+async def list_presets():
+    """Available samplers, presets and the benchmark table they are checked against"""
+    return {
+        "samplers": [name for name in SAMPLERS
+                     if name != "lcm" or Config.LCM_LORA_ID],
+        "image_presets": {name: resolve_image_preset(name) for name in IMAGE_PRESETS},
+        "video_presets": VIDEO_PRESETS,
+        "benchmarks": SAMPLER_BENCHMARKS
+    }
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the API process is up (models may still be loading)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe, per model and per job type.
+
+    Returns 200 as soon as any job type can be served (the image model loads
+    much faster than the video model), 503 while nothing is loaded.
+    """
+    models = await run_in_threadpool(model_readiness)
+    job_types = {
+        job_type: all(models[name]["loaded"] for name in required)
+        for job_type, required in JOB_TYPE_MODELS.items()
+    }
+    body = {"models": models, "job_types": job_types}
+    if not any(job_types.values()):
+        return JSONResponse(status_code=503, content=body, headers={"Retry-After": "10"})
+    return body
+
 @app.post("/api/v1/generate/image", response_model=JobResponse)
-async def generate_image(
-    background_tasks: BackgroundTasks,
-    request: ImageGenerationRequest
-):
+async def generate_image(request: ImageGenerationRequest, http_request: Request):
     """Generate interior design image from text prompt"""
     job_id = str(uuid.uuid4())
+    client_id = client_id_of(http_request)
     
-    jobs[job_id] = {
-        "job_id": job_id,
-        "job_type": "image",
-        "status": "queued",
-        "progress": 0,
-        "message": "Job queued",
-        "created_at": datetime.now().isoformat()
-    }
-    
-    background_tasks.add_task(process_image_generation, job_id, request)
+    await run_in_threadpool(create_job, job_id, "image", client_id,
+                            payload={"request": request.model_dump()},
+                            batch_key=image_batch_key(request))
     
     return JobResponse(
         job_id=job_id,
@@ -457,72 +2903,163 @@ async def generate_image(
 
 @app.post("/api/v1/generate/video", response_model=JobResponse)
 async def generate_video(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
+    http_request: Request,
+    file: Optional[UploadFile] = File(default=None),
+    image_job_id: Optional[str] = None,
+    image_hash: Optional[str] = None,
     room_type: str = "living_room",
     motion_style: str = "moderate",
     enhance_lighting: bool = True,
-    adjust_contrast: bool = True
+    adjust_contrast: bool = True,
+    preset: str = "fast",
+    target_fps: Optional[int] = None,
+    interpolation: str = "blend"
 ):
-    """Generate video from uploaded image"""
+    """Generate video from an uploaded image.
+
+    Instead of uploading, an image already on the server can be referenced
+    by the id of the job that generated it (``image_job_id``) or by the
+    SHA-256 of an earlier upload (``image_hash``, returned by this endpoint).
+    """
     job_id = str(uuid.uuid4())
     
-    # Save uploaded file
-    file_ext = Path(file.filename).suffix.lower()
-    if file_ext not in Config.ALLOWED_EXTENSIONS:
-        raise HTTPException(400, "Invalid file type")
-    
-    upload_path = os.path.join(Config.UPLOAD_DIR, f"{job_id}{file_ext}")
-    with open(upload_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    jobs[job_id] = {
-        "job_id": job_id,
-        "job_type": "video",
-        "status": "queued",
-        "progress": 0,
-        "message": "Job queued",
-        "created_at": datetime.now().isoformat()
-    }
+    try:
+        request = VideoGenerationRequest(
+            room_type=room_type,
+            motion_style=motion_style,
+            enhance_lighting=enhance_lighting,
+            adjust_contrast=adjust_contrast,
+            preset=preset,
+            target_fps=target_fps,
+            interpolation=interpolation
+        )
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+    
+    client_id = client_id_of(http_request)
+    
+    # Save uploaded file (type from its content, hashed while copying), or
+    # link the referenced one; file I/O and hashing run off the event loop
+    image_path, image_sha256 = await run_in_threadpool(
+        video_input, job_id, file, image_job_id, image_hash)
     
-    # Video Generation Settings
-    VIDEO_NUM_FRAMES = 14  # Reduced from 25 for faster CPU generation
-    VIDEO_DECODE_CHUNK_SIZE = 2 # Reduced for memory efficiency
-    VIDEO_STEPS = 10 # Reduced from 25 for speed
+    cache_key = video_cache_key(image_sha256, request)
+    cached = video_cache.get(cache_key)
+    if cached is not None:
+        try:
+            link_or_copy(cached["path"], os.path.join(Config.OUTPUT_DIR, f"{job_id}.mp4"))
+        except OSError:
+            cached = None  # Evicted between lookup and link
     
-    request = VideoGenerationRequest(
-        room_type=room_type,
-        motion_style=motion_style,
-        enhance_lighting=enhance_lighting,
-        adjust_contrast=adjust_contrast
+    if cached is not None:
+        video_url = f"/api/v1/download/video/{job_id}"
+        await run_in_threadpool(
+            create_job, job_id, "video", client_id, admit=False, status="completed",
+            progress=100,
+            message="Video generated successfully! (cached)",
+            video_url=video_url,
+            duration=cached.get("duration"),
+            frames=cached.get("frames"),
+            cached=True,
+            completed_at=datetime.now().isoformat())
+        return JobResponse(
+            job_id=job_id,
+            status="completed",
+            message="Video generated successfully! (cached)",
+            video_url=video_url,
+            image_hash=image_sha256
+        )
+    
+    try:
+        await run_in_threadpool(create_job, job_id, "video", client_id, payload={
+            "image_path": image_path,
+            "request": request.model_dump(),
+            "cache_key": cache_key
+        })
+    except HTTPException:
+        await run_in_threadpool(remove_job_files, job_id)
+        raise
+    
+    return JobResponse(
+        job_id=job_id,
+        status="queued",
+        message="Video generation started",
+        image_hash=image_sha256
     )
+
+@app.post("/api/v1/generate/video/variants", response_model=JobResponse)
+async def generate_video_variants(
+    http_request: Request,
+    file: Optional[UploadFile] = File(default=None),
+    image_job_id: Optional[str] = None,
+    image_hash: Optional[str] = None,
+    motion_styles: str = "subtle,moderate,dynamic",
+    room_type: str = "living_room",
+    enhance_lighting: bool = True,
+    adjust_contrast: bool = True,
+    preset: str = "fast",
+    target_fps: Optional[int] = None,
+    interpolation: str = "blend"
+):
+    """Generate one video per motion style (comma-separated) from one image.
+
+    The styles are rendered in a single batched call that encodes the image
+    once, which costs much less than separate requests. The image can be
+    referenced instead of uploaded, as for ``/api/v1/generate/video``.
+    """
+    job_id = str(uuid.uuid4())
+    
+    styles = list(dict.fromkeys(s.strip() for s in motion_styles.split(",") if s.strip()))
+    valid_styles = VideoGenerationRequest.model_fields["motion_style"].json_schema_extra["enum"]
+    unknown = [s for s in styles if s not in valid_styles]
+    if not styles or unknown:
+        raise HTTPException(422, f"motion_styles must be a comma-separated subset of {valid_styles}")
+    if len(styles) > Config.MAX_VIDEO_VARIANTS:
+        raise HTTPException(422, f"At most {Config.MAX_VIDEO_VARIANTS} motion styles per request")
     
-    background_tasks.add_task(process_video_generation, job_id, upload_path, request)
+    try:
+        request = VideoGenerationRequest(
+            room_type=room_type,
+            enhance_lighting=enhance_lighting,
+            adjust_contrast=adjust_contrast,
+            preset=preset,
+            target_fps=target_fps,
+            interpolation=interpolation
+        )
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+    
+    client_id = client_id_of(http_request)
+    
+    # Save uploaded file, or link the referenced one (off the event loop)
+    image_path, image_sha256 = await run_in_threadpool(
+        video_input, job_id, file, image_job_id, image_hash)
+    
+    try:
+        await run_in_threadpool(create_job, job_id, "video-variants", client_id, payload={
+            "image_path": image_path,
+            "motion_styles": styles,
+            "request": request.model_dump()
+        })
+    except HTTPException:
+        await run_in_threadpool(remove_job_files, job_id)
+        raise
     
     return JobResponse(
         job_id=job_id,
         status="queued",
-        message="Video generation started"
+        message=f"Generation of {len(styles)} video variants started",
+        image_hash=image_sha256
     )
 
 @app.post("/api/v1/generate/image-to-video", response_model=JobResponse)
-async def generate_image_to_video(
-    background_tasks: BackgroundTasks,
-    request: ImageToVideoRequest
-):
+async def generate_image_to_video(request: ImageToVideoRequest, http_request: Request):
     """Generate image from text, then create video (complete pipeline)"""
     job_id = str(uuid.uuid4())
+    client_id = client_id_of(http_request)
     
-    jobs[job_id] = {
-        "job_id": job_id,
-        "job_type": "image-to-video",
-        "status": "queued",
-        "progress": 0,
-        "message": "Job queued",
-        "created_at": datetime.now().isoformat()
-    }
-    
-    background_tasks.add_task(process_image_to_video, job_id, request)
+    await run_in_threadpool(create_job, job_id, "image-to-video", client_id,
+                            payload={"request": request.model_dump()})
     
     return JobResponse(
         job_id=job_id,
@@ -530,12 +3067,132 @@ async def generate_image_to_video(
         message="Image-to-video generation started"
     )
 
+async def wait_for_job_change(job_id: str, since_version: Optional[int],
+                              timeout: float) -> Optional[dict]:
+    """Wait until the job's version differs from ``since_version``.
+
+    Returns the current job record (possibly unchanged on timeout), or None
+    if the job does not exist / was deleted. The job store is shared across
+    API workers, so the check is a cheap indexed lookup repeated server-side.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        job = await run_in_threadpool(job_store.get, job_id)
+        if job is None or since_version is None or job["version"] != since_version:
+            return job
+        if time.monotonic() >= deadline:
+            return job
+        await asyncio.sleep(Config.EVENT_POLL_INTERVAL)
+
 @app.get("/api/v1/status/{job_id}", response_model=JobStatus)
-async def get_status(job_id: str):
-    """Get job status"""
-    if job_id not in jobs:
+async def get_status(
+    job_id: str,
+    wait: float = Query(default=0, ge=0, description="Long-poll: seconds to wait for a change"),
+    since_version: Optional[int] = Query(default=None, description="Version the client already has")
+):
+    """Get job status.
+
+    With ``wait`` and ``since_version`` the request blocks (up to ``wait``
+    seconds) until the job changes, as a fallback for clients that cannot
+    use the SSE or WebSocket endpoints.
+    """
+    if wait and since_version is not None:
+        job = await wait_for_job_change(
+            job_id, since_version, min(wait, Config.LONG_POLL_MAX_WAIT)
+        )
+    else:
+        job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
         raise HTTPException(404, "Job not found")
-    return JobStatus(**jobs[job_id])
+    await run_in_threadpool(job_store.touch, job_id)
+    return job_status(job)
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/api/v1/events/{job_id}")
+async def job_events(job_id: str):
+    """Stream job status as Server-Sent Events until the job finishes.
+
+    Each change of the job record (status transition, per-step progress, ETA,
+    stage timings, result URLs) is pushed as a ``status`` event.
+    """
+    if await run_in_threadpool(job_store.get, job_id) is None:
+        raise HTTPException(404, "Job not found")
+    
+    async def event_stream():
+        version = None
+        while True:
+            job = await wait_for_job_change(job_id, version, Config.EVENT_KEEPALIVE)
+            if job is None:
+                yield format_sse("deleted", {"job_id": job_id})
+                return
+            
+            # The open stream counts as the client still waiting
+            await run_in_threadpool(job_store.touch, job_id)
+            if job["version"] == version:
+                yield ": keep-alive\n\n"
+                continue
+            
+            version = job["version"]
+            yield format_sse("status", job_status(job).model_dump())
+            if job["status"] in TERMINAL_STATUSES:
+                return
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/api/v1/ws")
+async def job_events_websocket(websocket: WebSocket):
+    """Multiplexed job status over one WebSocket.
+
+    Client messages: ``{"subscribe": [job_id, ...]}`` and
+    ``{"unsubscribe": [job_id, ...]}``. The server pushes
+    ``{"event": "status", "job": {...}}`` on every change of a subscribed job,
+    ``{"event": "deleted", "job_id": ...}`` or ``{"event": "error", ...}``.
+    Jobs are unsubscribed automatically once they complete, fail or are cancelled.
+    """
+    await websocket.accept()
+    versions = {}  # job_id -> last version sent (None = nothing sent yet)
+    
+    async def receive_commands():
+        while True:
+            message = await websocket.receive_json()
+            for job_id in message.get("subscribe", []):
+                versions.setdefault(job_id, None)
+            for job_id in message.get("unsubscribe", []):
+                versions.pop(job_id, None)
+    
+    receiver = asyncio.create_task(receive_commands())
+    try:
+        while not receiver.done():
+            for job_id, version in list(versions.items()):
+                job = await run_in_threadpool(job_store.get, job_id)
+                if job is None:
+                    versions.pop(job_id, None)
+                    event = "error" if version is None else "deleted"
+                    await websocket.send_json({"event": event, "job_id": job_id,
+                                               "message": "Job not found"})
+                    continue
+                await run_in_threadpool(job_store.touch, job_id)
+                if job["version"] == version:
+                    continue
+                
+                versions[job_id] = job["version"]
+                await websocket.send_json({"event": "status",
+                                           "job": job_status(job).model_dump()})
+                if job["status"] in TERMINAL_STATUSES:
+                    versions.pop(job_id, None)
+            
+            await asyncio.wait({receiver}, timeout=Config.EVENT_POLL_INTERVAL)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
 
 @app.get("/api/v1/download/image/{job_id}")
 async def download_image(job_id: str):
@@ -543,7 +3200,8 @@ async def download_image(job_id: str):
     # Handle both direct job_id and job_id_image patterns
     image_id = job_id.replace("_image", "")
     
-    if image_id not in jobs and job_id not in jobs:
+    if (await run_in_threadpool(job_store.get, image_id) is None
+            and await run_in_threadpool(job_store.get, job_id) is None):
         raise HTTPException(404, "Job not found")
     
     # Try both filename patterns
@@ -561,10 +3219,49 @@ async def download_image(job_id: str):
         filename=f"interior_design_{job_id}.png"
     )
 
+@app.get("/api/v1/download/preview/{job_id}")
+async def download_preview(job_id: str):
+    """Download the latest low-res preview of a running image job"""
+    if await run_in_threadpool(job_store.get, job_id) is None:
+        raise HTTPException(404, "Job not found")
+    
+    path = preview_path(job_id)
+    if not os.path.exists(path):
+        raise HTTPException(404, "Preview not available yet")
+    
+    # Replaced as generation advances, so clients must not cache it
+    return FileResponse(path, media_type="image/jpeg",
+                        headers={"Cache-Control": "no-store"})
+
+async def follow_video(job_id: str, video_path: str):
+    """Yield a video file while it is still being written, until the job ends"""
+    with open(video_path, "rb") as f:
+        while True:
+            chunk = f.read(Config.VIDEO_STREAM_CHUNK)
+            if chunk:
+                yield chunk
+                continue
+            job = await run_in_threadpool(job_store.get, job_id)
+            await run_in_threadpool(job_store.touch, job_id)
+            if job is None or job["status"] in TERMINAL_STATUSES:
+                # Pick up whatever was flushed between the last read and now
+                rest = f.read()
+                if rest:
+                    yield rest
+                return
+            await asyncio.sleep(Config.VIDEO_STREAM_POLL)
+
 @app.get("/api/v1/download/video/{job_id}")
 async def download_video(job_id: str):
-    """Download generated video"""
-    if job_id not in jobs:
+    """Download generated video.
+
+    While the job is still rendering, the fragmented MP4 is streamed as it
+    grows so playback can start before the last frame is encoded.
+    """
+    # Variants of a multi-variant job are named {job_id}_{motion_style}
+    base_id = job_id.split("_", 1)[0]
+    job = await run_in_threadpool(job_store.get, base_id)
+    if job is None:
         raise HTTPException(404, "Job not found")
     
     video_path = os.path.join(Config.OUTPUT_DIR, f"{job_id}.mp4")
@@ -572,6 +3269,10 @@ async def download_video(job_id: str):
     if not os.path.exists(video_path):
         raise HTTPException(404, "Video not found")
     
+    if job["status"] not in TERMINAL_STATUSES:
+        return StreamingResponse(follow_video(base_id, video_path),
+                                 media_type="video/mp4")
+    
     return FileResponse(
         video_path,
         media_type="video/mp4",
@@ -579,33 +3280,63 @@ async def download_video(job_id: str):
     )
 
 @app.get("/api/v1/jobs")
-async def list_jobs():
-    """List all jobs"""
-    return {"jobs": list(jobs.values())}
+async def list_jobs(
+    status: Optional[str] = None,
+    job_type: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0)
+):
+    """List jobs (newest first), optionally filtered by status and job type"""
+    page, total = await run_in_threadpool(job_store.list, status=status, job_type=job_type,
+                                          limit=limit, offset=offset)
+    return {"jobs": page, "total": total, "limit": limit, "offset": offset}
+
+@app.post("/api/v1/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job (running jobs stop at their next step)"""
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    if not await run_in_threadpool(job_store.cancel, job_id):
+        raise HTTPException(409, f"Job already {job['status']}")
+    return {"message": "Job cancelled"}
 
 @app.delete("/api/v1/jobs/{job_id}")
 async def delete_job(job_id: str):
-    """Delete job and files"""
-    if job_id not in jobs:
+    """Delete job and files (a running job stops at its next step)"""
+    if await run_in_threadpool(job_store.get, job_id) is None:
         raise HTTPException(404, "Job not found")
     
-    # Delete files
-    for directory in [Config.UPLOAD_DIR, Config.OUTPUT_DIR, Config.GENERATED_IMAGES_DIR]:
-        for file in Path(directory).glob(f"{job_id}*"):
-            file.unlink()
-    
-    del jobs[job_id]
+    # The worker treats a missing job as cancelled and removes anything it
+    # writes after this
+    await run_in_threadpool(job_store.delete, job_id)
+    await run_in_threadpool(remove_job_files, job_id)
     return {"message": "Job deleted"}
 
 @app.on_event("startup")
 async def startup():
-    """Preload models on startup"""
+    """Start the inference worker (it preloads the models itself)"""
     print("Starting Complete Interior Design API...")
-    print("Preloading models (this may take a few minutes)...")
-    image_generator.load_model()
-    video_generator.load_model()
-    print("✅ API Ready!")
+    inference_worker.start()
+    # Keep a reference so the task is not garbage collected
+    app.state.worker_supervisor = asyncio.create_task(inference_worker.supervise())
+    print("✅ API Ready! (models are loading in the inference worker)")
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the inference worker"""
+    inference_worker.stop()
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if "--worker" in sys.argv:
+        # Standalone inference worker (e.g. on a separate container)
+        inference_worker_main()
+    elif "--prepare-models" in sys.argv:
+        prepare_model_cache()
+    elif "--benchmark-samplers" in sys.argv:
+        benchmark_samplers()
+    elif "--check-backend" in sys.argv:
+        sys.exit(0 if check_backend() else 1)
+    else:
+        import uvicorn
+        uvicorn.run(app, host="0.0.0.0", port=8000)
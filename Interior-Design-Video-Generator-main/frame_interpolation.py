@@ -0,0 +1,123 @@
+"""
+Frame interpolation for generated videos
+
+SVD produces 14-20 frames at 6-8 fps; every extra diffused frame costs a full
+share of the denoising time. Interpolating between the generated frames
+raises the frame rate for a few milliseconds per frame instead.
+
+Two methods, both vectorized in NumPy:
+
+- ``blend``: linear cross-fade between neighbouring frames.
+- ``motion``: estimates the global (camera) shift between two frames by phase
+  correlation and moves both frames along it before blending, which avoids
+  the ghosting a plain cross-fade shows on pans.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+INTERPOLATION_METHODS = ("blend", "motion")
+
+
+def interpolation_factor(source_fps: float, target_fps: Optional[float]) -> int:
+    """Whole number of output frames per generated frame for ``target_fps``"""
+    if not target_fps or target_fps <= source_fps:
+        return 1
+    return max(1, int(round(target_fps / source_fps)))
+
+
+def estimate_shift(a: np.ndarray, b: np.ndarray) -> tuple:
+    """Global (dy, dx) translation taking frame ``a`` to frame ``b``"""
+    ga = a.mean(axis=2, dtype=np.float32)
+    gb = b.mean(axis=2, dtype=np.float32)
+    cross = np.fft.rfft2(gb) * np.conj(np.fft.rfft2(ga))
+    cross /= np.abs(cross) + 1e-8
+    correlation = np.fft.irfft2(cross, s=ga.shape)
+    dy, dx = np.unravel_index(np.argmax(correlation), correlation.shape)
+    height, width = ga.shape
+    # Peaks past the midpoint are negative shifts (the spectrum wraps around)
+    if dy > height // 2:
+        dy -= height
+    if dx > width // 2:
+        dx -= width
+    return int(dy), int(dx)
+
+
+def shift_frame(frame: np.ndarray, dy: int, dx: int) -> np.ndarray:
+    """Translate a frame by whole pixels, repeating the edge pixels"""
+    if dy == 0 and dx == 0:
+        return frame
+    height, width = frame.shape[:2]
+    pad = ((abs(dy), abs(dy)), (abs(dx), abs(dx))) + ((0, 0),) * (frame.ndim - 2)
+    padded = np.pad(frame, pad, mode="edge")
+    top = abs(dy) - dy
+    left = abs(dx) - dx
+    return padded[top:top + height, left:left + width]
+
+
+def interpolate_pair(a: np.ndarray, b: np.ndarray, factor: int,
+                     method: str = "blend") -> np.ndarray:
+    """The ``factor - 1`` frames strictly between ``a`` and ``b``"""
+    t = (np.arange(1, factor, dtype=np.float32) / factor)[:, None, None, None]
+    if method == "motion":
+        dy, dx = estimate_shift(a, b)
+        starts = np.stack([shift_frame(a, round(w * dy), round(w * dx)) for w in t.ravel()])
+        ends = np.stack([shift_frame(b, -round((1 - w) * dy), -round((1 - w) * dx))
+                         for w in t.ravel()])
+    else:
+        starts, ends = a[None], b[None]
+    mixed = starts * (1 - t) + ends * t
+    return np.clip(mixed + 0.5, 0, 255).astype(np.uint8)
+
+
+def interpolate_frames(frames: np.ndarray, factor: int, method: str = "blend") -> np.ndarray:
+    """Insert ``factor - 1`` frames between each pair of ``[N, H, W, 3]`` frames"""
+    interpolator = FrameInterpolator(factor, method)
+    return interpolator.push(frames)
+
+
+class FrameInterpolator:
+    """Incremental interpolation over frames that arrive in chunks.
+
+    Keeps the last frame of each chunk so the gap to the next chunk is
+    filled too; the output is the same as interpolating all frames at once.
+    """
+
+    def __init__(self, factor: int, method: str = "blend"):
+        if method not in INTERPOLATION_METHODS:
+            raise ValueError(f"Unknown interpolation method '{method}'. "
+                             f"Choose from: {', '.join(INTERPOLATION_METHODS)}")
+        self.factor = factor
+        self.method = method
+        self.previous = None
+
+    def push(self, frames: np.ndarray) -> np.ndarray:
+        """Output frames for a chunk of ``[N, H, W, 3]`` uint8 input frames"""
+        if self.factor <= 1 or len(frames) == 0:
+            return frames
+        if self.previous is None:
+            starts, ends = frames[:-1], frames[1:]
+            output = [frames[:1]]
+        else:
+            starts = np.concatenate([self.previous[None], frames[:-1]])
+            ends = frames
+            output = []
+        self.previous = frames[-1]
+        if len(starts) == 0:
+            return np.concatenate(output)
+
+        if self.method == "blend":
+            # All pairs of the chunk at once: [pairs, factor - 1, H, W, 3]
+            t = (np.arange(1, self.factor, dtype=np.float32) / self.factor)[None, :, None, None, None]
+            mixed = starts[:, None] * (1 - t) + ends[:, None] * t
+            between = np.clip(mixed + 0.5, 0, 255).astype(np.uint8)
+        else:
+            between = np.stack([interpolate_pair(a, b, self.factor, self.method)
+                                for a, b in zip(starts, ends)])
+
+        # Interleave: in-between frames of each pair, then the pair's end frame
+        pairs = np.concatenate([between, ends[:, None]], axis=1)
+        output.append(pairs.reshape((-1,) + frames.shape[1:]))
+        return np.concatenate(output)
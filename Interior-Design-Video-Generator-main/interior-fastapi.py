@@ -2,11 +2,12 @@
 FastAPI Server for Interior Design Video Generation
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Query
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Callable
 import torch
 from diffusers import StableVideoDiffusionPipeline
 from PIL import Image, ImageEnhance
@@ -14,10 +15,15 @@ import imageio
 import numpy as np
 import os
 import uuid
-import shutil
 from datetime import datetime
 from pathlib import Path
 import asyncio
+import threading
+
+from job_store import JobStore
+from prefork import serve_preforked, memory_report, process_group_pids
+from frame_interpolation import INTERPOLATION_METHODS, interpolate_frames, interpolation_factor
+from uploads import UploadError, UploadSizeLimit, open_image, save_upload
 
 # ============================================================================
 # Configuration
@@ -27,10 +33,19 @@ class Config:
     UPLOAD_DIR = "uploads"
     OUTPUT_DIR = "outputs"
     TEMP_DIR = "temp"
+    JOB_DB_PATH = "video_jobs.db"  # SQLite job store shared by all API workers
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    MAX_IMAGE_PIXELS = 40_000_000  # Uploads larger than this are refused
     ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
     MODEL_ID = "stabilityai/stable-video-diffusion-img2vid"
+    # API worker processes; >1 preloads the model once and forks the workers
+    # so they share the weights copy-on-write (see prefork.py)
+    WORKERS = int(os.getenv("API_WORKERS", "1"))
     HUGGINGFACE_TOKEN = None  # Set this if needed
+    # Active jobs nobody has polled for this many seconds are cancelled; 0 disables
+    JOB_ABANDON_TIMEOUT = int(os.getenv("JOB_ABANDON_TIMEOUT", "600"))
+    # Finished jobs and their files are deleted this many hours after they end; 0 keeps them
+    JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
 
 # ============================================================================
 # Models
@@ -50,6 +65,18 @@ class VideoGenerationRequest(BaseModel):
     )
     enhance_lighting: bool = Field(default=True, description="Enhance image lighting")
     adjust_contrast: bool = Field(default=True, description="Adjust image contrast")
+    target_fps: Optional[int] = Field(
+        default=None, ge=1, le=60,
+        description="Interpolate the generated frames up to this frame rate"
+    )
+    interpolation: str = Field(default="blend", description="Interpolation method: blend or motion")
+    
+    @model_validator(mode="after")
+    def check_interpolation(self):
+        if self.interpolation not in INTERPOLATION_METHODS:
+            raise ValueError(f"Unknown interpolation '{self.interpolation}'. "
+                             f"Choose from: {', '.join(INTERPOLATION_METHODS)}")
+        return self
 
 class VideoGenerationResponse(BaseModel):
     job_id: str
@@ -117,7 +144,8 @@ class InteriorVideoGenerator:
     def preprocess_image(self, image_path: str, enhance_lighting: bool = True,
                         adjust_contrast: bool = True, target_size: int = 384):
         """Preprocess interior image"""
-        image = Image.open(image_path).convert("RGB")
+        # Large JPEGs decode at a reduced scale instead of full resolution
+        image = open_image(image_path, (target_size, target_size)).convert("RGB")
         
         if enhance_lighting:
             enhancer = ImageEnhance.Brightness(image)
@@ -134,8 +162,15 @@ class InteriorVideoGenerator:
                       room_type: str = "living_room",
                       motion_style: str = "moderate",
                       enhance_lighting: bool = True,
-                      adjust_contrast: bool = True):
-        """Generate video from image"""
+                      adjust_contrast: bool = True,
+                      target_fps: Optional[int] = None,
+                      interpolation: str = "blend",
+                      on_step: Optional[Callable] = None):
+        """Generate video from image, interpolated up to ``target_fps`` if given.
+
+        ``on_step`` is called after each denoising step and may raise to
+        stop generation.
+        """
         
         # Ensure model is loaded
         self.load_model()
@@ -164,11 +199,19 @@ class InteriorVideoGenerator:
             motion_bucket_id=motion_bucket,
             fps=fps,
             decode_chunk_size=2,
-            generator=torch.manual_seed(42)
+            generator=torch.manual_seed(42),
+            callback_on_step_end=on_step
         ).frames[0]
         
         # Convert to numpy
-        video_frames_np = [np.array(frame) for frame in video_frames]
+        video_frames_np = np.stack([np.array(frame) for frame in video_frames])
+        
+        # Fill in frames between the generated ones (much cheaper than
+        # diffusing more frames)
+        factor = interpolation_factor(fps, target_fps)
+        if factor > 1:
+            video_frames_np = interpolate_frames(video_frames_np, factor, interpolation)
+            fps = fps * factor
         
         # Save video
         imageio.mimsave(
@@ -181,9 +224,9 @@ class InteriorVideoGenerator:
         )
         
         return {
-            "frames": len(video_frames),
+            "frames": len(video_frames_np),
             "fps": fps,
-            "duration": len(video_frames) / fps,
+            "duration": len(video_frames_np) / fps,
             "file_size_mb": os.path.getsize(output_path) / (1024 * 1024)
         }
 
@@ -197,6 +240,11 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Refuse oversized upload bodies as they arrive (64 KB allowance for the
+# multipart framing); added before CORS so the 413 keeps the CORS headers
+app.add_middleware(UploadSizeLimit, max_bytes=Config.MAX_FILE_SIZE + 64 * 1024,
+                   path_prefixes=("/api/v1/generate",))
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -208,14 +256,17 @@ app.add_middleware(
 
 # Global generator instance
 generator = InteriorVideoGenerator(huggingface_token=Config.HUGGINGFACE_TOKEN)
-
-# Job tracking
-jobs = {}
+# One generation at a time: the pipeline (and its scheduler) is shared, and
+# concurrent SVD runs would multiply peak memory
+generation_lock = threading.Lock()
 
 # Create directories
 for directory in [Config.UPLOAD_DIR, Config.OUTPUT_DIR, Config.TEMP_DIR]:
     os.makedirs(directory, exist_ok=True)
 
+# Job tracking (persistent, shared by all API workers)
+job_store = JobStore(Config.JOB_DB_PATH)
+
 # ============================================================================
 # Helper Functions
 # ============================================================================
@@ -230,22 +281,67 @@ def cleanup_old_files():
             if current_time - file.stat().st_mtime > 3600:  # 1 hour
                 file.unlink()
 
-async def process_video_generation(job_id: str, image_path: str,
-                                   request: VideoGenerationRequest):
-    """Background task for video generation"""
+def remove_job_files(job_id: str):
+    """Delete a job's upload and video"""
+    for directory in [Config.UPLOAD_DIR, Config.OUTPUT_DIR]:
+        for file in Path(directory).glob(f"{job_id}.*"):
+            file.unlink(missing_ok=True)
+
+class JobCancelled(Exception):
+    """Raised from the step callback once a job was cancelled or deleted"""
+
+def cancellation_callback(job_id: str):
+    """Step callback that stops generation when the job is no longer running"""
+    def check(pipe, step, timestep, callback_kwargs):
+        if job_store.statuses([job_id]).get(job_id) != "processing":
+            raise JobCancelled(job_id)
+        return callback_kwargs
+    return check
+
+def cancel_abandoned_jobs(running_job_id: str):
+    """Cancel jobs nobody polls any more, except the one about to run"""
+    if not Config.JOB_ABANDON_TIMEOUT:
+        return
+    abandoned = job_store.cancel_abandoned(Config.JOB_ABANDON_TIMEOUT,
+                                           exclude=(running_job_id,))
+    if abandoned:
+        print(f"Cancelled {len(abandoned)} abandoned job(s)")
+
+def purge_old_jobs():
+    """Delete finished jobs past their retention period, with their files"""
+    if not Config.JOB_RETENTION_HOURS:
+        return
+    purged = job_store.purge(Config.JOB_RETENTION_HOURS * 3600)
+    for job_id in purged:
+        remove_job_files(job_id)
+    if purged:
+        print(f"Purged {len(purged)} old job(s)")
+
+def process_video_generation(job_id: str, image_path: str,
+                             request: VideoGenerationRequest):
+    """Background task for video generation.
+
+    A plain function, so Starlette runs it in its threadpool: generation
+    blocks for minutes and must not stall the event loop serving polls.
+    Jobs wait for ``generation_lock`` (still "queued") and run one by one.
+    """
+    with generation_lock:
+        run_video_generation(job_id, image_path, request)
+
+def run_video_generation(job_id: str, image_path: str,
+                         request: VideoGenerationRequest):
+    output_path = os.path.join(Config.OUTPUT_DIR, f"{job_id}.mp4")
+    cancel_abandoned_jobs(job_id)
+    purge_old_jobs()
     try:
-        # Update job status
-        jobs[job_id]["status"] = "processing"
-        jobs[job_id]["progress"] = 10
-        jobs[job_id]["message"] = "Starting video generation..."
-        
-        # Generate output path
-        output_filename = f"{job_id}.mp4"
-        output_path = os.path.join(Config.OUTPUT_DIR, output_filename)
+        # Update job status (a job cancelled while queued is not started)
+        if not job_store.transition(job_id, ("queued",), status="processing", progress=10,
+                                    message="Starting video generation..."):
+            return
         
         # Update progress
-        jobs[job_id]["progress"] = 30
-        jobs[job_id]["message"] = "Generating video frames..."
+        job_store.transition(job_id, ("processing",), progress=30,
+                             message="Generating video frames...")
         
         # Generate video
         result = generator.generate_video(
@@ -254,24 +350,38 @@ async def process_video_generation(job_id: str, image_path: str,
             room_type=request.room_type,
             motion_style=request.motion_style,
             enhance_lighting=request.enhance_lighting,
-            adjust_contrast=request.adjust_contrast
+            adjust_contrast=request.adjust_contrast,
+            target_fps=request.target_fps,
+            interpolation=request.interpolation,
+            on_step=cancellation_callback(job_id)
         )
         
-        # Update job as completed
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["message"] = "Video generated successfully!"
-        jobs[job_id]["video_url"] = f"/api/v1/download/{job_id}"
-        jobs[job_id]["duration"] = result["duration"]
-        jobs[job_id]["frames"] = result["frames"]
-        jobs[job_id]["file_size_mb"] = result["file_size_mb"]
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        # Update job as completed (unless it was cancelled meanwhile)
+        job_store.transition(
+            job_id, ("processing",),
+            status="completed",
+            progress=100,
+            message="Video generated successfully!",
+            video_url=f"/api/v1/download/{job_id}",
+            duration=result["duration"],
+            frames=result["frames"],
+            file_size_mb=result["file_size_mb"],
+            completed_at=datetime.now().isoformat()
+        )
         
+    except JobCancelled:
+        print(f"Stopped cancelled job {job_id}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    
     except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["progress"] = 0
-        jobs[job_id]["message"] = f"Error: {str(e)}"
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        job_store.transition(
+            job_id, ("processing",),
+            status="failed",
+            progress=0,
+            message=f"Error: {str(e)}",
+            completed_at=datetime.now().isoformat()
+        )
 
 # ============================================================================
 # API Endpoints
@@ -299,6 +409,7 @@ async def health_check():
         "status": "healthy",
         "device": generator.device,
         "model_loaded": generator.pipe is not None,
+        "memory": memory_report(process_group_pids()),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -309,7 +420,9 @@ async def generate_video(
     room_type: str = "living_room",
     motion_style: str = "moderate",
     enhance_lighting: bool = True,
-    adjust_contrast: bool = True
+    adjust_contrast: bool = True,
+    target_fps: Optional[int] = None,
+    interpolation: str = "blend"
 ):
     """
     Generate video from interior design image
@@ -319,46 +432,41 @@ async def generate_video(
     - **motion_style**: Animation style (subtle, moderate, dynamic, showcase)
     - **enhance_lighting**: Enhance image lighting
     - **adjust_contrast**: Adjust image contrast
+    - **target_fps**: Interpolate up to this frame rate (e.g. 24)
+    - **interpolation**: Interpolation method (blend, motion)
     """
     
-    # Validate file extension
-    file_ext = Path(file.filename).suffix.lower()
-    if file_ext not in Config.ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed: {Config.ALLOWED_EXTENSIONS}"
+    try:
+        request = VideoGenerationRequest(
+            room_type=room_type,
+            motion_style=motion_style,
+            enhance_lighting=enhance_lighting,
+            adjust_contrast=adjust_contrast,
+            target_fps=target_fps,
+            interpolation=interpolation
         )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     
     # Generate job ID
     job_id = str(uuid.uuid4())
     
-    # Save uploaded file
-    upload_path = os.path.join(Config.UPLOAD_DIR, f"{job_id}{file_ext}")
-    
+    # Save uploaded file (streamed with a size limit; type checked from
+    # content), in the threadpool so the copy does not block the event loop
     try:
-        with open(upload_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
+        upload = await run_in_threadpool(
+            save_upload, file.file, Config.UPLOAD_DIR, job_id, Config.MAX_FILE_SIZE,
+            allowed_extensions=Config.ALLOWED_EXTENSIONS,
+            max_pixels=Config.MAX_IMAGE_PIXELS)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except OSError as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    upload_path = upload.path
     
     # Create job entry
-    jobs[job_id] = {
-        "job_id": job_id,
-        "status": "queued",
-        "progress": 0,
-        "message": "Job queued for processing",
-        "created_at": datetime.now().isoformat(),
-        "video_url": None,
-        "completed_at": None
-    }
-    
-    # Create request object
-    request = VideoGenerationRequest(
-        room_type=room_type,
-        motion_style=motion_style,
-        enhance_lighting=enhance_lighting,
-        adjust_contrast=adjust_contrast
-    )
+    await run_in_threadpool(job_store.create, job_id, "video",
+                            message="Job queued for processing")
     
     # Add background task
     background_tasks.add_task(
@@ -378,20 +486,21 @@ async def generate_video(
 async def get_job_status(job_id: str):
     """Get job status by ID"""
     
-    if job_id not in jobs:
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return JobStatus(**jobs[job_id])
+    await run_in_threadpool(job_store.touch, job_id)
+    return JobStatus(**job)
 
 @app.get("/api/v1/download/{job_id}")
 async def download_video(job_id: str):
     """Download generated video"""
     
-    if job_id not in jobs:
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
-    
     if job["status"] != "completed":
         raise HTTPException(
             status_code=400,
@@ -409,27 +518,44 @@ async def download_video(job_id: str):
         filename=f"interior_design_{job_id}.mp4"
     )
 
+@app.post("/api/v1/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job (running jobs stop at their next step)"""
+    
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if not await run_in_threadpool(job_store.cancel, job_id):
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    
+    return {"message": "Job cancelled"}
+
 @app.delete("/api/v1/jobs/{job_id}")
 async def delete_job(job_id: str):
-    """Delete job and associated files"""
+    """Delete job and associated files (a running job stops at its next step)"""
     
-    if job_id not in jobs:
+    if await run_in_threadpool(job_store.get, job_id) is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
     # Delete files
-    for directory in [Config.UPLOAD_DIR, Config.OUTPUT_DIR]:
-        for file in Path(directory).glob(f"{job_id}.*"):
-            file.unlink()
+    await run_in_threadpool(remove_job_files, job_id)
     
-    # Remove from jobs
-    del jobs[job_id]
+    # Remove from job store
+    await run_in_threadpool(job_store.delete, job_id)
     
     return {"message": "Job deleted successfully"}
 
 @app.get("/api/v1/jobs")
-async def list_jobs():
-    """List all jobs"""
-    return {"jobs": list(jobs.values())}
+async def list_jobs(
+    status: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0)
+):
+    """List jobs (newest first), optionally filtered by status"""
+    page, total = await run_in_threadpool(job_store.list, status=status,
+                                          limit=limit, offset=offset)
+    return {"jobs": page, "total": total, "limit": limit, "offset": offset}
 
 # ============================================================================
 # Startup Event
@@ -448,5 +574,9 @@ async def startup_event():
 # ============================================================================
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # The model is loaded before the workers are forked, so the startup
+    # event's load_model() call is a no-op in each worker. CUDA contexts
+    # cannot be forked, so GPU hosts run a single worker.
+    workers = Config.WORKERS if generator.device == "cpu" else 1
+    serve_preforked(app, host="0.0.0.0", port=8000,
+                    workers=workers, preload=generator.load_model)
@@ -0,0 +1,552 @@
+"""
+SQLite-backed job store shared by the Interior Design APIs
+
+Jobs live in a WAL-mode SQLite database so that status survives restarts and
+every uvicorn worker (and the inference worker process) sees the same records.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional, List, Tuple, Iterable
+
+# Fields stored as real (indexed / filterable) columns. Everything else a job
+# carries (image_url, video_url, duration, frames, ...) goes in the JSON
+# ``data`` column and is merged back into the job dict on read.
+COLUMNS = ("job_id", "job_type", "status", "progress", "message",
+           "created_at", "updated_at", "completed_at", "version",
+           "priority", "client_id", "started_at", "last_seen_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id       TEXT PRIMARY KEY,
+    job_type     TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    progress     INTEGER NOT NULL DEFAULT 0,
+    message      TEXT NOT NULL DEFAULT '',
+    created_at   TEXT NOT NULL,
+    updated_at   TEXT NOT NULL,
+    completed_at TEXT,
+    version      INTEGER NOT NULL DEFAULT 0,
+    payload      TEXT,
+    data         TEXT NOT NULL DEFAULT '{}',
+    batch_key    TEXT,
+    priority     INTEGER NOT NULL DEFAULT 0,
+    client_id    TEXT,
+    started_at   TEXT,
+    last_seen_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_type_created ON jobs (job_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (status, batch_key, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_client ON jobs (status, client_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_type_completed ON jobs (job_type, status, completed_at);
+
+CREATE TABLE IF NOT EXISTS worker_state (
+    key        TEXT PRIMARY KEY,
+    value      TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Columns added after the first release: (name, definition) for ALTER TABLE
+ADDED_COLUMNS = (
+    ("batch_key", "TEXT"),
+    ("priority", "INTEGER NOT NULL DEFAULT 0"),
+    ("client_id", "TEXT"),
+    ("started_at", "TEXT"),
+    ("last_seen_at", "TEXT"),
+)
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+ACTIVE_STATUSES = ("queued", "processing")
+
+
+class AdmissionRefused(Exception):
+    """``JobStore.create`` refused a job because a limit was reached"""
+
+    def __init__(self, limit: str, count: int):
+        super().__init__(f"{limit} limit reached ({count} jobs)")
+        self.limit = limit  # "client" (active jobs of the client) or "queue"
+        self.count = count
+
+
+class JobStore:
+    """Persistent job records with atomic state transitions.
+
+    Connections are opened lazily per thread (and per process, so a store
+    object inherited through ``fork`` reconnects instead of sharing a handle).
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_schema()
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        # Columns added after the first release, for databases created earlier
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for name, definition in ADDED_COLUMNS:
+            if existing and name not in existing:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {definition}")
+        conn.executescript(SCHEMA)
+
+    def _write(self):
+        """Context manager for a write transaction (BEGIN IMMEDIATE)"""
+        return _Transaction(self._connect())
+
+    # ------------------------------------------------------------------
+    # Row conversion
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> dict:
+        job = json.loads(row["data"])
+        for column in COLUMNS:
+            job[column] = row[column]
+        return job
+
+    @staticmethod
+    def _split_fields(fields: dict) -> Tuple[dict, dict]:
+        columns = {k: v for k, v in fields.items() if k in COLUMNS}
+        extra = {k: v for k, v in fields.items() if k not in COLUMNS}
+        return columns, extra
+
+    # ------------------------------------------------------------------
+    # CRUD
+    # ------------------------------------------------------------------
+
+    def create(self, job_id: str, job_type: str, payload: Optional[dict] = None,
+               status: str = "queued", message: str = "Job queued",
+               batch_key: Optional[str] = None, priority: int = 0,
+               client_id: Optional[str] = None, max_client_active: Optional[int] = None,
+               max_queued: Optional[int] = None, **fields) -> dict:
+        """Insert a new job and return it.
+
+        Queued jobs with the same ``batch_key`` can be claimed together with
+        ``claim_batch`` and processed in one batched pipeline call. Higher
+        ``priority`` jobs are claimed first; ``client_id`` is used to share
+        the worker fairly between clients (see ``claim_next``).
+
+        Admission limits are checked in the same transaction as the insert,
+        so concurrent requests cannot all slip under them: raises
+        ``AdmissionRefused`` if the client already has ``max_client_active``
+        queued or running jobs, or ``max_queued`` jobs of this type wait.
+        """
+        now = datetime.now().isoformat()
+        _, extra = self._split_fields(fields)
+        with self._write() as conn:
+            if max_client_active is not None:
+                count = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'processing') "
+                    "AND client_id IS ?", (client_id,)
+                ).fetchone()[0]
+                if count >= max_client_active:
+                    raise AdmissionRefused("client", count)
+            if max_queued is not None:
+                count = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND job_type = ?",
+                    (job_type,)
+                ).fetchone()[0]
+                if count >= max_queued:
+                    raise AdmissionRefused("queue", count)
+            conn.execute(
+                "INSERT INTO jobs (job_id, job_type, status, progress, message, "
+                "created_at, updated_at, completed_at, version, payload, data, batch_key, "
+                "priority, client_id, last_seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?, ?, ?, ?, ?)",
+                (job_id, job_type, status, fields.get("progress", 0), message,
+                 fields.get("created_at", now), now, fields.get("completed_at"),
+                 json.dumps(payload) if payload is not None else None,
+                 json.dumps(extra), batch_key, priority, client_id, now)
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._connect().execute(
+            "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def get_payload(self, job_id: str) -> Optional[dict]:
+        row = self._connect().execute(
+            "SELECT payload FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None or row["payload"] is None:
+            return None
+        return json.loads(row["payload"])
+
+    def update(self, job_id: str, **fields) -> bool:
+        """Update fields of a job. Returns False if the job does not exist."""
+        return self.transition(job_id, None, **fields)
+
+    def transition(self, job_id: str, from_statuses: Optional[Iterable[str]],
+                   **fields) -> bool:
+        """Atomically update a job if its status is one of ``from_statuses``.
+
+        ``from_statuses=None`` applies the update unconditionally. Returns
+        False when the job is missing or was not in an allowed state.
+        """
+        columns, extra = self._split_fields(fields)
+        columns.pop("job_id", None)
+        columns.pop("version", None)
+        columns["updated_at"] = datetime.now().isoformat()
+
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT status, data FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            if from_statuses is not None and row["status"] not in tuple(from_statuses):
+                return False
+
+            if extra:
+                data = json.loads(row["data"])
+                data.update(extra)
+                columns["data"] = json.dumps(data)
+
+            assignments = ", ".join(f"{name} = ?" for name in columns)
+            conn.execute(
+                f"UPDATE jobs SET {assignments}, version = version + 1 WHERE job_id = ?",
+                (*columns.values(), job_id)
+            )
+        return True
+
+    def cancel(self, job_id: str, message: str = "Job cancelled") -> bool:
+        """Mark a queued or running job cancelled (the worker stops at its next check)"""
+        return self.transition(job_id, ACTIVE_STATUSES, status="cancelled", message=message,
+                               completed_at=datetime.now().isoformat())
+
+    def statuses(self, job_ids: Iterable[str]) -> dict:
+        """job_id -> status for the given jobs (missing jobs are left out)"""
+        job_ids = tuple(job_ids)
+        rows = self._connect().execute(
+            f"SELECT job_id, status FROM jobs WHERE job_id IN ({', '.join('?' for _ in job_ids)})",
+            job_ids
+        ).fetchall()
+        return {row["job_id"]: row["status"] for row in rows}
+
+    def delete(self, job_id: str) -> bool:
+        with self._write() as conn:
+            cursor = conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        return cursor.rowcount > 0
+
+    def list(self, status: Optional[str] = None, job_type: Optional[str] = None,
+             limit: int = 50, offset: int = 0) -> Tuple[List[dict], int]:
+        """Return a page of jobs (newest first) and the total matching count"""
+        conditions = []
+        params = []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if job_type:
+            conditions.append("job_type = ?")
+            params.append(job_type)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM jobs {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset)
+        ).fetchall()
+        return [self._row_to_job(row) for row in rows], total
+
+    # ------------------------------------------------------------------
+    # Queue operations
+    # ------------------------------------------------------------------
+
+    def claim_next(self, job_types: Optional[Iterable[str]] = None) -> Optional[dict]:
+        """Atomically move the next queued job to "processing" and return it.
+
+        Highest priority first. Within a priority, clients take turns: the
+        job chosen is the one with the fewest earlier queued jobs from the
+        same client (so every client's oldest job goes before anyone's
+        second), preferring clients with fewer jobs already running, then
+        the oldest.
+        """
+        params = []
+        type_filter = ""
+        if job_types:
+            job_types = tuple(job_types)
+            type_filter = f"AND j.job_type IN ({', '.join('?' for _ in job_types)})"
+            params.extend(job_types)
+
+        with self._write() as conn:
+            row = conn.execute(
+                f"SELECT j.job_id FROM jobs j WHERE j.status = 'queued' {type_filter} "
+                "ORDER BY j.priority DESC, "
+                "(SELECT COUNT(*) FROM jobs q WHERE q.status = 'queued' "
+                " AND q.client_id IS j.client_id AND q.created_at < j.created_at), "
+                "(SELECT COUNT(*) FROM jobs r WHERE r.status = 'processing' "
+                " AND r.client_id IS j.client_id), "
+                "j.created_at LIMIT 1",
+                params
+            ).fetchone()
+            if row is None:
+                return None
+            now = datetime.now().isoformat()
+            conn.execute(
+                "UPDATE jobs SET status = 'processing', updated_at = ?, started_at = ?, "
+                "version = version + 1 WHERE job_id = ?",
+                (now, now, row["job_id"])
+            )
+        return self.get(row["job_id"])
+
+    def claim_batch(self, batch_key: str, limit: int,
+                    batch_clients: Iterable[Optional[str]] = ()) -> List[dict]:
+        """Atomically claim up to ``limit`` queued jobs sharing ``batch_key``.
+
+        Clients take turns as in ``claim_next``. ``batch_clients`` are the
+        clients of the jobs already in the batch; while clients with other
+        queued jobs of the same type are waiting, each client gets one job per batch, so a
+        burst of compatible requests cannot jump ahead of them.
+        """
+        if limit <= 0:
+            return []
+        with self._write() as conn:
+            candidates = conn.execute(
+                "SELECT j.job_id, j.client_id FROM jobs j "
+                "WHERE j.status = 'queued' AND j.batch_key = ? "
+                "ORDER BY (SELECT COUNT(*) FROM jobs q WHERE q.status = 'queued' "
+                " AND q.client_id IS j.client_id AND q.created_at < j.created_at), "
+                "(SELECT COUNT(*) FROM jobs r WHERE r.status = 'processing' "
+                " AND r.client_id IS j.client_id), "
+                "j.created_at",
+                (batch_key,)
+            ).fetchall()
+            waiting = {row["client_id"] for row in conn.execute(
+                "SELECT DISTINCT client_id FROM jobs WHERE status = 'queued' "
+                "AND batch_key IS NOT ? "
+                "AND job_type IN (SELECT job_type FROM jobs WHERE batch_key = ?)",
+                (batch_key, batch_key)
+            )}
+            in_batch = set(batch_clients)
+            rows = []
+            for row in candidates:
+                if len(rows) >= limit:
+                    break
+                client = row["client_id"]
+                if client in in_batch and waiting - {client}:
+                    continue
+                in_batch.add(client)
+                rows.append(row)
+            job_ids = [row["job_id"] for row in rows]
+            if job_ids:
+                now = datetime.now().isoformat()
+                conn.execute(
+                    "UPDATE jobs SET status = 'processing', updated_at = ?, started_at = ?, "
+                    f"version = version + 1 WHERE job_id IN ({', '.join('?' for _ in job_ids)})",
+                    (now, now, *job_ids)
+                )
+        return [self.get(job_id) for job_id in job_ids]
+
+    def get_batch_key(self, job_id: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT batch_key FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return row["batch_key"] if row else None
+
+    def requeue_interrupted(self) -> int:
+        """Put jobs left in "processing" by a crashed worker back in the queue"""
+        with self._write() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', progress = 0, started_at = NULL, "
+                "message = 'Job re-queued after restart', updated_at = ?, "
+                "version = version + 1 WHERE status = 'processing'",
+                (datetime.now().isoformat(),)
+            )
+        return cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Client liveness
+    # ------------------------------------------------------------------
+
+    def touch(self, job_id: str, min_interval: float = 5.0):
+        """Record that a client is still following an active job.
+
+        Does not bump ``version`` (nothing a client sees changed) and skips
+        the write if the job was touched within ``min_interval`` seconds.
+        """
+        now = datetime.now()
+        cutoff = datetime.fromtimestamp(now.timestamp() - min_interval).isoformat()
+        self._connect().execute(
+            "UPDATE jobs SET last_seen_at = ? WHERE job_id = ? "
+            "AND status IN ('queued', 'processing') "
+            "AND (last_seen_at IS NULL OR last_seen_at < ?)",
+            (now.isoformat(), job_id, cutoff)
+        )
+
+    def cancel_abandoned(self, timeout: float, exclude: Iterable[str] = ()) -> List[str]:
+        """Cancel active jobs no client has polled for ``timeout`` seconds.
+
+        Jobs in ``exclude`` (e.g. the ones the caller is running) are kept.
+        """
+        now = datetime.now()
+        cutoff = datetime.fromtimestamp(now.timestamp() - timeout).isoformat()
+        exclude = list(exclude)
+        condition = (f" AND job_id NOT IN ({', '.join('?' for _ in exclude)})"
+                     if exclude else "")
+        with self._write() as conn:
+            rows = conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN ('queued', 'processing') "
+                "AND COALESCE(last_seen_at, created_at) < ?" + condition,
+                (cutoff, *exclude)
+            ).fetchall()
+            job_ids = [row["job_id"] for row in rows]
+            if job_ids:
+                conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', updated_at = ?, completed_at = ?, "
+                    "message = 'Job cancelled: no client polled for its status', "
+                    f"version = version + 1 WHERE job_id IN ({', '.join('?' for _ in job_ids)})",
+                    (now.isoformat(), now.isoformat(), *job_ids)
+                )
+        return job_ids
+
+    def purge(self, retention: float, limit: int = 500) -> List[str]:
+        """Delete up to ``limit`` jobs that finished more than ``retention`` seconds ago.
+
+        Returns the deleted job ids so the caller can remove their files.
+        """
+        cutoff = datetime.fromtimestamp(datetime.now().timestamp() - retention).isoformat()
+        with self._write() as conn:
+            rows = conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN ('completed', 'failed', 'cancelled') "
+                "AND COALESCE(completed_at, updated_at) < ? LIMIT ?",
+                (cutoff, limit)
+            ).fetchall()
+            job_ids = [row["job_id"] for row in rows]
+            if job_ids:
+                conn.execute(
+                    f"DELETE FROM jobs WHERE job_id IN ({', '.join('?' for _ in job_ids)})",
+                    job_ids
+                )
+        return job_ids
+
+    # ------------------------------------------------------------------
+    # Scheduling statistics
+    # ------------------------------------------------------------------
+
+    def queued_ahead(self, job: dict) -> dict:
+        """Queued jobs that will (approximately) be claimed before ``job``, by type"""
+        rows = self._connect().execute(
+            "SELECT job_type, COUNT(*) AS n FROM jobs WHERE status = 'queued' "
+            "AND (priority > ? OR (priority = ? AND created_at < ?)) GROUP BY job_type",
+            (job["priority"], job["priority"], job["created_at"])
+        ).fetchall()
+        return {row["job_type"]: row["n"] for row in rows}
+
+    def average_duration(self, job_type: str, window: int = 20) -> Optional[float]:
+        """Mean processing seconds of the last ``window`` completed jobs of a type"""
+        row = self._connect().execute(
+            "SELECT AVG((julianday(completed_at) - julianday(started_at)) * 86400) FROM "
+            "(SELECT completed_at, started_at FROM jobs WHERE job_type = ? "
+            " AND status = 'completed' AND started_at IS NOT NULL "
+            " ORDER BY completed_at DESC LIMIT ?)",
+            (job_type, window)
+        ).fetchone()
+        return row[0]
+
+    def processing(self) -> List[dict]:
+        rows = self._connect().execute(
+            "SELECT * FROM jobs WHERE status = 'processing'"
+        ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    # ------------------------------------------------------------------
+    # Worker state (shared key/value, e.g. model readiness)
+    # ------------------------------------------------------------------
+
+    def set_state(self, key: str, value):
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO worker_state (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                "updated_at = excluded.updated_at",
+                (key, json.dumps(value), time.time())
+            )
+
+    def get_state(self, key: str, default=None):
+        row = self._connect().execute(
+            "SELECT value FROM worker_state WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew a named lease; only one owner holds it at a time.
+
+        Used so that exactly one inference worker runs even when several API
+        processes each try to start one.
+        """
+        now = time.time()
+        key = f"lease:{name}"
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT value FROM worker_state WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                lease = json.loads(row["value"])
+                if lease["owner"] != owner and lease["expires_at"] > now:
+                    return False
+            conn.execute(
+                "INSERT INTO worker_state (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                "updated_at = excluded.updated_at",
+                (key, json.dumps({"owner": owner, "expires_at": now + ttl}), now)
+            )
+        return True
+
+    def release_lease(self, name: str, owner: str):
+        key = f"lease:{name}"
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT value FROM worker_state WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and json.loads(row["value"])["owner"] == owner:
+                conn.execute("DELETE FROM worker_state WHERE key = ?", (key,))
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK around a connection"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
@@ -0,0 +1,196 @@
+"""
+Preload-then-fork helpers for sharing model weights between processes
+
+Model weights are loaded once in a parent process, then worker processes are
+forked from it. The children see the parent's tensors copy-on-write, so the
+read-only weights exist once in physical memory instead of once per worker.
+``memory_usage`` reads the kernel's proportional set size (PSS) so the
+sharing can be checked: with N workers sharing W bytes of weights, each
+worker's PSS only carries W / N of them.
+"""
+
+import gc
+import os
+import sys
+import time
+import signal
+import socket
+import threading
+import multiprocessing
+from typing import Callable, Iterable, List, Optional
+
+
+# PID of the process that preloaded the models and forked the workers
+preforked_parent = None
+
+
+def fork_supported() -> bool:
+    return hasattr(os, "fork") and "fork" in multiprocessing.get_all_start_methods()
+
+
+def freeze_heap():
+    """Move all current objects to the permanent GC generation.
+
+    Without this the cyclic GC in each child writes to the headers of every
+    Python object it scans, un-sharing the pages they live on.
+    """
+    gc.collect()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
+
+
+def fork_process(target: Callable, *args, name: Optional[str] = None):
+    """Start ``target(*args)`` in a forked child (inherits loaded models)"""
+    ctx = multiprocessing.get_context("fork")
+    process = ctx.Process(target=target, args=args, name=name, daemon=True)
+    process.start()
+    return process
+
+
+def watch_parent(parent_pid: int, interval: float = 1.0):
+    """SIGTERM this process once ``parent_pid`` is gone.
+
+    A parent killed with SIGTERM skips its atexit cleanup, so its daemonic
+    children would otherwise live on as orphans.
+    """
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(interval)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    threading.Thread(target=watch, name="parent-watchdog", daemon=True).start()
+
+
+def limit_torch_threads(workers: int):
+    """Give each of ``workers`` processes an equal share of the CPUs"""
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    torch.set_num_threads(max(1, cpus // workers))
+
+
+# ============================================================================
+# Memory accounting
+# ============================================================================
+
+SMAPS_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_clean_mb",
+    "Shared_Dirty": "shared_dirty_mb",
+    "Private_Clean": "private_clean_mb",
+    "Private_Dirty": "private_dirty_mb",
+}
+
+
+def memory_usage(pid="self") -> dict:
+    """RSS / PSS / shared / private memory of a process in MB (Linux only).
+
+    RSS counts shared pages fully in every process; PSS divides each shared
+    page by the number of processes mapping it, so summing PSS over all
+    workers gives the real physical footprint.
+    """
+    usage = {"pid": os.getpid() if pid == "self" else pid}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                key = parts[0].rstrip(":")
+                if key in SMAPS_FIELDS:
+                    usage[SMAPS_FIELDS[key]] = round(int(parts[1]) / 1024, 1)
+    except OSError:
+        try:
+            import resource
+            # ru_maxrss is KB on Linux, bytes on macOS; close enough as a fallback
+            usage["rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        except ImportError:
+            pass
+    return usage
+
+
+def memory_report(pids: Iterable) -> dict:
+    """Aggregate memory of a group of processes, showing how much is shared"""
+    processes = [memory_usage(pid) for pid in pids]
+    total_rss = sum(p.get("rss_mb", 0) for p in processes)
+    total_pss = sum(p.get("pss_mb", 0) for p in processes)
+    return {
+        "processes": processes,
+        "total_rss_mb": round(total_rss, 1),
+        "total_pss_mb": round(total_pss, 1),
+        # Memory that would be duplicated without copy-on-write sharing
+        "saved_by_sharing_mb": round(total_rss - total_pss, 1) if total_pss else None
+    }
+
+
+def process_group_pids() -> List[int]:
+    """PIDs sharing the preloaded weights: the pre-fork parent and its children.
+
+    Outside pre-fork mode this is just the current process.
+    """
+    if preforked_parent is None:
+        return [os.getpid()]
+    try:
+        with open(f"/proc/{preforked_parent}/task/{preforked_parent}/children") as f:
+            children = [int(pid) for pid in f.read().split()]
+    except OSError:
+        return [os.getpid()]
+    return [preforked_parent] + children
+
+
+# ============================================================================
+# Pre-forked HTTP serving
+# ============================================================================
+
+def serve_preforked(app, host: str, port: int, workers: int,
+                    preload: Optional[Callable] = None):
+    """Run ``workers`` uvicorn processes that share preloaded model weights.
+
+    Unlike ``uvicorn --workers`` (which spawns fresh interpreters that each
+    load their own weights), ``preload`` runs once in this process and the
+    workers are forked afterwards, all accepting on one listening socket.
+    Dead workers are re-forked from the preloaded parent. Each worker gets
+    an equal share of the torch intra-op threads and exits when the parent
+    does.
+    """
+    import uvicorn
+    global preforked_parent
+
+    if preload is not None:
+        preload()
+
+    if workers <= 1 or not fork_supported():
+        uvicorn.run(app, host=host, port=port)
+        return
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    freeze_heap()
+    preforked_parent = os.getpid()
+
+    def serve():
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        watch_parent(preforked_parent)
+        limit_torch_threads(workers)
+        config = uvicorn.Config(app, host=host, port=port)
+        uvicorn.Server(config).run(sockets=[sock])
+
+    # Stop the workers on SIGTERM too, not only on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    children: List = [fork_process(serve, name=f"api-worker-{i}") for i in range(workers)]
+    print(f"Serving on http://{host}:{port} with {workers} pre-forked workers")
+    try:
+        while True:
+            for i, child in enumerate(children):
+                child.join(timeout=1)
+                if not child.is_alive():
+                    print(f"Worker {child.pid} exited ({child.exitcode}), restarting")
+                    children[i] = fork_process(serve, name=f"api-worker-{i}")
+    except (KeyboardInterrupt, SystemExit):
+        for child in children:
+            child.terminate()
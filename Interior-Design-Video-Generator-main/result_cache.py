@@ -0,0 +1,107 @@
+"""
+Content-addressed cache of generated results
+
+Generation is deterministic (fixed seed), so an output is fully determined by
+its inputs. Each entry is stored under a hash of those inputs together with a
+small JSON sidecar of result metadata. The directory is kept under a byte
+budget by evicting the least recently used entries; a hit refreshes the
+entry's mtime, which doubles as its recency.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+from typing import Optional
+
+
+def content_key(**parts) -> str:
+    """Stable hash of the keyword arguments (values must be JSON-serializable)"""
+    blob = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def link_or_copy(src: str, dst: str):
+    """Hard-link ``src`` to ``dst`` (no extra disk), copying across filesystems"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        import shutil
+        shutil.copyfile(src, dst)
+
+
+class ResultCache:
+    """LRU disk cache of result files keyed by ``content_key``"""
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def meta_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        """Metadata of a cached result (with its ``path``), or None on a miss"""
+        path = self.path(key)
+        try:
+            with open(self.meta_path(key)) as f:
+                meta = json.load(f)
+            now = time.time()
+            os.utime(path, (now, now))
+        except (OSError, ValueError):
+            return None
+        meta["path"] = path
+        return meta
+
+    def put(self, key: str, src_path: str, meta: Optional[dict] = None):
+        """Add a result file; concurrent writers of the same key are harmless"""
+        tmp = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}")
+        link_or_copy(src_path, tmp)
+        os.replace(tmp, self.path(key))
+        # The sidecar is written last: an entry only counts once it exists
+        with open(tmp, "w") as f:
+            json.dump(meta or {}, f)
+        os.replace(tmp, self.meta_path(key))
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits its budget"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if name.startswith(".") or name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name[:len(name) - len(self.suffix)]))
+            total += stat.st_size
+
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in (self.meta_path(key), self.path(key)):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            total -= size
+
+    def stats(self) -> dict:
+        sizes = [
+            os.path.getsize(os.path.join(self.directory, name))
+            for name in os.listdir(self.directory)
+            if not name.startswith(".") and not name.endswith(".json")
+        ]
+        return {
+            "entries": len(sizes),
+            "size_mb": round(sum(sizes) / (1024 * 1024), 1),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 1)
+        }
@@ -0,0 +1,106 @@
+"""
+Stage-pipelined execution of multi-step jobs
+
+A job that runs several steps one after another (image diffusion, video
+diffusion, VAE decode, video encode) keeps every resource but one idle at
+any moment. Here each step is a stage with its own worker thread and a
+bounded queue in front of it. A job moves on to the next stage's queue
+when a stage is done with it, so job N's encode overlaps job N+1's
+diffusion.
+
+Full queues block the stage handing work on (backpressure), and
+``has_capacity`` tells the producer when to stop admitting jobs. Sustained
+throughput approaches the rate of the slowest stage: the one whose
+utilization is close to 100%.
+"""
+
+import time
+import queue
+import threading
+from collections import deque
+from typing import Callable, Iterable, Optional
+
+
+class PipelineStage:
+    """One worker thread running tasks from a bounded queue"""
+
+    def __init__(self, name: str, queue_size: int = 1, window: float = 300,
+                 initializer: Optional[Callable[[str], None]] = None):
+        self.name = name
+        self.initializer = initializer  # Called with the name on the stage's thread
+        self.tasks = queue.Queue(maxsize=queue_size)
+        self.window = window
+        self.created = time.monotonic()
+        self.busy = deque()  # (start, end) of recent tasks
+        self.current_start = None
+        self.completed = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self._run, name=f"stage-{name}", daemon=True).start()
+
+    def submit(self, fn: Callable, *args):
+        """Queue ``fn(*args)``; blocks while the queue is full"""
+        self.tasks.put((fn, args))
+
+    def _run(self):
+        if self.initializer is not None:
+            self.initializer(self.name)
+        while True:
+            fn, args = self.tasks.get()
+            with self.lock:
+                self.current_start = time.monotonic()
+            try:
+                fn(*args)
+            except Exception as e:
+                # Tasks handle their own failures; never let one kill the stage
+                print(f"⚠️ Stage {self.name}: unhandled error: {e}")
+            finally:
+                with self.lock:
+                    self.busy.append((self.current_start, time.monotonic()))
+                    self.current_start = None
+                    self.completed += 1
+
+    def stats(self) -> dict:
+        """Utilization (busy fraction) and throughput over the recent window"""
+        now = time.monotonic()
+        since = max(now - self.window, self.created)
+        with self.lock:
+            while self.busy and self.busy[0][1] < since:
+                self.busy.popleft()
+            intervals = list(self.busy)
+            finished = len(intervals)
+            if self.current_start is not None:
+                intervals.append((self.current_start, now))
+        busy = sum(end - max(start, since) for start, end in intervals)
+        elapsed = max(now - since, 1e-6)
+        return {
+            "utilization": round(busy / elapsed, 3),
+            "jobs_per_minute": round(finished * 60 / elapsed, 2),
+            "queued": self.tasks.qsize(),
+            "busy": self.current_start is not None,
+            "completed": self.completed
+        }
+
+
+class StagePipeline:
+    """Named stages connected by bounded queues"""
+
+    def __init__(self, stage_names: Iterable[str], queue_size: int = 1, window: float = 300,
+                 initializer: Optional[Callable[[str], None]] = None):
+        self.stage_names = list(stage_names)
+        self.stages = {name: PipelineStage(name, queue_size, window, initializer)
+                       for name in self.stage_names}
+
+    def submit(self, stage: str, fn: Callable, *args):
+        self.stages[stage].submit(fn, *args)
+
+    def has_capacity(self) -> bool:
+        """Whether a new job can enter the first stage without blocking"""
+        return not self.stages[self.stage_names[0]].tasks.full()
+
+    def stats(self) -> dict:
+        stages = {name: stage.stats() for name, stage in self.stages.items()}
+        return {
+            "stages": stages,
+            # The stage that limits sustained throughput
+            "bottleneck": max(stages, key=lambda name: stages[name]["utilization"])
+        }
@@ -10,6 +10,9 @@ import argparse
 
 API_BASE = "http://localhost:8000"
 
+# Statuses a job never leaves (same as job_store.TERMINAL_STATUSES)
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
 def health_check():
     """Check API health"""
     print("\n" + "="*60)
@@ -29,6 +32,42 @@ def health_check():
         print(f"❌ Health check failed: {response.status_code}")
         return False
 
+def watch_job(job_id: str):
+    """Yield job status updates as they happen (no fixed-interval polling).
+
+    Uses the SSE stream at /api/v1/events/{job_id}; if streaming is not
+    available or drops, falls back to long-polling /api/v1/status.
+    """
+    status = None
+    try:
+        with requests.get(f"{API_BASE}/api/v1/events/{job_id}",
+                          stream=True, timeout=(5, 60)) as response:
+            if response.status_code == 200:
+                event = None
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                    elif line.startswith("data:") and event == "status":
+                        status = json.loads(line[len("data:"):])
+                        yield status
+    except requests.RequestException:
+        pass
+    
+    # Long-poll fallback: each request blocks until the job changes
+    while status is None or status['status'] not in TERMINAL_STATUSES:
+        params = {}
+        if status is not None:
+            params = {"wait": 30, "since_version": status.get('version', 0)}
+        response = requests.get(f"{API_BASE}/api/v1/status/{job_id}",
+                                params=params, timeout=60)
+        if response.status_code == 404:
+            print("❌ Job no longer exists")
+            return
+        new_status = response.json()
+        if status is None or new_status.get('version') != status.get('version'):
+            yield new_status
+        status = new_status
+
 def test_image_generation(prompt: str):
     """Test image generation from text"""
     print("\n" + "="*60)
@@ -58,10 +97,7 @@ def test_image_generation(prompt: str):
     
     # Wait for completion
     print("\n⏳ Waiting for image generation...")
-    while True:
-        status_response = requests.get(f"{API_BASE}/api/v1/status/{job_id}")
-        status = status_response.json()
-        
+    for status in watch_job(job_id):
         print(f"📊 {status['status']} - {status['progress']}% - {status['message']}")
         
         if status['status'] == 'completed':
@@ -76,11 +112,9 @@ def test_image_generation(prompt: str):
             print(f"💾 Image saved: {output_path}")
             return output_path
             
-        elif status['status'] == 'failed':
-            print(f"\n❌ Generation failed: {status['message']}")
+        elif status['status'] in ('failed', 'cancelled'):
+            print(f"\n❌ Generation {status['status']}: {status['message']}")
             return None
-        
-        time.sleep(5)
 
 def test_video_from_image(image_path: str, room_type: str = "living_room", 
                          motion_style: str = "moderate"):
@@ -113,10 +147,7 @@ def test_video_from_image(image_path: str, room_type: str = "living_room",
     
     # Wait for completion
     print("\n⏳ Waiting for video generation...")
-    while True:
-        status_response = requests.get(f"{API_BASE}/api/v1/status/{job_id}")
-        status = status_response.json()
-        
+    for status in watch_job(job_id):
         print(f"📊 {status['status']} - {status['progress']}% - {status['message']}")
         
         if status['status'] == 'completed':
@@ -133,11 +164,9 @@ def test_video_from_image(image_path: str, room_type: str = "living_room",
             print(f"💾 Video saved: {output_path}")
             return output_path
             
-        elif status['status'] == 'failed':
-            print(f"\n❌ Generation failed: {status['message']}")
+        elif status['status'] in ('failed', 'cancelled'):
+            print(f"\n❌ Generation {status['status']}: {status['message']}")
             return None
-        
-        time.sleep(5)
 
 def test_image_to_video_pipeline(prompt: str, room_type: str = "living_room",
                                 motion_style: str = "moderate"):
@@ -172,10 +201,7 @@ def test_image_to_video_pipeline(prompt: str, room_type: str = "living_room",
     print("\n⏳ Waiting for complete generation...")
     image_downloaded = False
     
-    while True:
-        status_response = requests.get(f"{API_BASE}/api/v1/status/{job_id}")
-        status = status_response.json()
-        
+    for status in watch_job(job_id):
         print(f"📊 {status['status']} - {status['progress']}% - {status['message']}")
         
         # Download image when available
@@ -205,11 +231,9 @@ def test_image_to_video_pipeline(prompt: str, room_type: str = "living_room",
             print(f"💾 Video saved: {video_path}")
             return video_path
             
-        elif status['status'] == 'failed':
-            print(f"\n❌ Generation failed: {status['message']}")
+        elif status['status'] in ('failed', 'cancelled'):
+            print(f"\n❌ Generation {status['status']}: {status['message']}")
             return None
-        
-        time.sleep(5)
 
 def list_all_jobs():
     """List all jobs"""
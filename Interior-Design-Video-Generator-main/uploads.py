@@ -0,0 +1,187 @@
+"""
+Upload handling for image inputs
+
+Uploads are streamed to disk in chunks while their SHA-256 is computed, so
+the content hash used by the result cache costs no second pass. The size
+limit is enforced as the bytes arrive: ``UploadSizeLimit`` refuses an
+oversized request body before it is spooled, and ``save_upload`` stops
+copying at the limit. The image type comes from the file's magic bytes, not
+the client-supplied filename. ``open_image`` lets JPEGs decode straight at a
+reduced scale (PIL draft mode), so a huge photo that is only needed at
+384x384 never materializes at full resolution.
+"""
+
+import os
+import uuid
+import hashlib
+from typing import Optional
+
+from PIL import Image
+
+
+# Leading bytes of each accepted image type -> (format, file extension)
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", ("JPEG", ".jpg")),
+    (b"\x89PNG\r\n\x1a\n", ("PNG", ".png")),
+)
+
+SNIFF_BYTES = max(len(signature) for signature, _ in IMAGE_SIGNATURES)
+
+
+class UploadError(Exception):
+    """Rejected upload; ``status_code`` is the HTTP status to answer with"""
+    status_code = 400
+
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+
+def sniff_image_type(head: bytes) -> Optional[tuple]:
+    """``(format, extension)`` of an image from its first bytes, or None"""
+    for signature, image_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return image_type
+    return None
+
+
+class StoredUpload:
+    """An upload written to disk: its path, type, size and content hash"""
+
+    def __init__(self, path: str, image_format: str, size: int, sha256: str,
+                 dimensions: tuple):
+        self.path = path
+        self.format = image_format
+        self.size = size
+        self.sha256 = sha256
+        self.dimensions = dimensions
+
+
+def save_upload(fileobj, directory: str, name: str, max_bytes: int,
+                allowed_extensions=None, max_pixels: Optional[int] = None,
+                chunk_size: int = 256 * 1024) -> StoredUpload:
+    """Copy an uploaded image to ``directory/name.<ext>`` in chunks.
+
+    The extension comes from the sniffed type. Raises ``UploadTooLarge``
+    as soon as more than ``max_bytes`` arrive, and ``UploadError`` for
+    unsupported or unreadable images (only the header is parsed here).
+    Nothing is left on disk when the upload is rejected.
+    """
+    head = fileobj.read(max(chunk_size, SNIFF_BYTES))
+    image_type = sniff_image_type(head)
+    if image_type is None or (allowed_extensions and image_type[1] not in allowed_extensions):
+        raise UploadError("Invalid file type: only JPEG and PNG images are accepted")
+    image_format, extension = image_type
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}{extension}")
+    tmp = os.path.join(directory, f".{name}.{uuid.uuid4().hex}")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp, "wb") as out:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File too large: the limit is "
+                                         f"{max_bytes // (1024 * 1024)} MB")
+                digest.update(chunk)
+                out.write(chunk)
+                chunk = fileobj.read(chunk_size)
+
+        # Header-only parse: checks the file is what its magic bytes claim
+        # and refuses decompression bombs before anything decodes pixels
+        try:
+            with Image.open(tmp) as image:
+                if image.format != image_format:
+                    raise UploadError("Invalid file type: content does not match its header")
+                dimensions = image.size
+        except UploadError:
+            raise
+        except Exception:
+            raise UploadError("Invalid image: the file could not be read")
+        if max_pixels and dimensions[0] * dimensions[1] > max_pixels:
+            raise UploadTooLarge(f"Image too large: {dimensions[0]}x{dimensions[1]} pixels")
+
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return StoredUpload(path, image_format, size, digest.hexdigest(), dimensions)
+
+
+def open_image(source, size: Optional[tuple] = None) -> Image.Image:
+    """Open an image; JPEGs decode at the smallest scale still covering ``size``"""
+    image = Image.open(source)
+    if size is not None and image.format == "JPEG":
+        image.draft("RGB", size)
+    return image
+
+
+class UploadSizeLimit:
+    """ASGI middleware answering 413 to request bodies over ``max_bytes``.
+
+    Applies to paths starting with one of ``path_prefixes``. A declared
+    Content-Length over the limit is refused before any of the body is
+    read; otherwise bytes are counted as they arrive (chunked uploads) and
+    the request is cut off once the limit is passed.
+    """
+
+    def __init__(self, app, max_bytes: int, path_prefixes=("/",)):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefixes = tuple(path_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            await self.reject(send)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes and not response_started:
+                    # Answer right away; the app's own error response (the
+                    # framework may turn this exception into a 400) is dropped
+                    rejected = True
+                    await self.reject(send)
+                    raise UploadTooLarge("Request body too large")
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not rejected:
+                raise
+
+    async def reject(self, send):
+        body = b'{"detail":"Request body too large: the upload limit is %d MB"}' % (
+            self.max_bytes // (1024 * 1024))
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1360,18 +1360,35 @@ async function generateImageFromText(prompt) {
     }
 }
 
+// SHA-256 of a file as hex (null where Web Crypto is unavailable)
+async function sha256Hex(file) {
+    if (!window.crypto || !crypto.subtle) return null;
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+}
+
+// An image the server already has (same SHA-256) is referenced, not re-uploaded
 async function generateVideoFromImage(file) {
     updateStatus("Generating Video...");
     try {
-        const formData = new FormData();
-        formData.append('file', file);
-        formData.append('room_type', 'living_room'); // Default
-        formData.append('motion_style', 'moderate');
-
-        const response = await fetch(`${DESIGN_API_URL}/generate/video`, {
-            method: 'POST',
-            body: formData
-        });
+        const params = new URLSearchParams({ room_type: 'living_room', motion_style: 'moderate' });
+        const endpoint = `${DESIGN_API_URL}/generate/video`;
+        let response = null;
+
+        // Same image sent before: refer to it by hash (404 = not stored, upload it)
+        const hash = await sha256Hex(file);
+        if (hash) {
+            response = await fetch(`${endpoint}?${params}&image_hash=${hash}`, { method: 'POST' });
+            if (response.status === 404) response = null;
+        }
+        if (!response) {
+            const formData = new FormData();
+            formData.append('file', file);
+            response = await fetch(`${endpoint}?${params}`, {
+                method: 'POST',
+                body: formData
+            });
+        }
 
         if (!response.ok) throw new Error("API Error");
 
@@ -1385,34 +1402,77 @@ async function generateVideoFromImage(file) {
     }
 }
 
-async function monitorJob(jobId, type) {
-    const interval = setInterval(async () => {
-        try {
-            const response = await fetch(`${DESIGN_API_URL}/status/${jobId}`);
-            const status = await response.json();
+function handleJobUpdate(jobId, type, status) {
+    if (status.status === 'completed') {
+        updateStatus('&nbsp;');
 
-            if (status.status === 'completed') {
-                clearInterval(interval);
-                updateStatus('&nbsp;');
+        if (type === 'image') {
+            const imageUrl = `${DESIGN_API_URL}/download/image/${jobId}`;
+            addMessageToChat(`✅ Image Generated!<br><img src="${imageUrl}" class="mt-2 rounded-lg max-w-full h-auto shadow-md" alt="Generated Design">`, 'assistant');
+        } else {
+            const videoUrl = `${DESIGN_API_URL}/download/video/${jobId}`;
+            addMessageToChat(`✅ Video Generated!<br><video controls autoplay loop class="mt-2 rounded-lg max-w-full h-auto shadow-md"><source src="${videoUrl}" type="video/mp4"></video>`, 'assistant');
+        }
+        return true;
+    } else if (status.status === 'failed' || status.status === 'cancelled') {
+        updateStatus('&nbsp;');
+        addMessageToChat(`❌ Generation Failed: ${status.message}`, 'assistant');
+        return true;
+    }
 
-                if (type === 'image') {
-                    const imageUrl = `${DESIGN_API_URL}/download/image/${jobId}`;
-                    addMessageToChat(`✅ Image Generated!<br><img src="${imageUrl}" class="mt-2 rounded-lg max-w-full h-auto shadow-md" alt="Generated Design">`, 'assistant');
-                } else {
-                    const videoUrl = `${DESIGN_API_URL}/download/video/${jobId}`;
-                    addMessageToChat(`✅ Video Generated!<br><video controls autoplay loop class="mt-2 rounded-lg max-w-full h-auto shadow-md"><source src="${videoUrl}" type="video/mp4"></video>`, 'assistant');
-                }
-            } else if (status.status === 'failed') {
-                clearInterval(interval);
+    const eta = status.eta_seconds ? ` (~${Math.ceil(status.eta_seconds)}s left)` : '';
+    updateStatus(`Processing: ${status.progress}%${eta}`);
+    return false;
+}
+
+// Job status is pushed by the server (SSE); long-polling is only a fallback
+function monitorJob(jobId, type) {
+    if (!window.EventSource) {
+        longPollJob(jobId, type, null);
+        return;
+    }
+
+    let lastStatus = null;
+    const source = new EventSource(`${DESIGN_API_URL}/events/${jobId}`);
+
+    source.addEventListener('status', (e) => {
+        lastStatus = JSON.parse(e.data);
+        if (handleJobUpdate(jobId, type, lastStatus)) {
+            source.close();
+        }
+    });
+
+    source.addEventListener('deleted', () => {
+        source.close();
+        updateStatus('&nbsp;');
+    });
+
+    source.onerror = () => {
+        // Stream dropped (or unsupported by a proxy): continue with long-polling
+        source.close();
+        if (!lastStatus || !['completed', 'failed', 'cancelled'].includes(lastStatus.status)) {
+            longPollJob(jobId, type, lastStatus ? lastStatus.version : null);
+        }
+    };
+}
+
+async function longPollJob(jobId, type, version) {
+    while (true) {
+        try {
+            const query = version === null ? '' : `?wait=30&since_version=${version}`;
+            const response = await fetch(`${DESIGN_API_URL}/status/${jobId}${query}`);
+            if (!response.ok) {
                 updateStatus('&nbsp;');
-                addMessageToChat(`❌ Generation Failed: ${status.message}`, 'assistant');
-            } else {
-                updateStatus(`Processing: ${status.progress}%`);
+                return;
             }
+            const status = await response.json();
+            version = status.version;
+            if (handleJobUpdate(jobId, type, status)) return;
         } catch (e) {
-            clearInterval(interval);
+            updateStatus('&nbsp;');
+            return;
         }
-    }, 2000);
+    }
 }
 // Event listeners for history sidebar
 if (toggleHistoryBtn) {
@@ -5,10 +5,12 @@ Runs on port 5001
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
 import os
 import uuid
+import asyncio
+import threading
 from pathlib import Path
 
 app = FastAPI(title="Coqui TTS Server", version="1.0.0")
@@ -28,6 +30,14 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # Global TTS model (loaded once)
 tts_model = None
+tts_model_lock = threading.Lock()
+
+# Readiness state: "loading" until the preload finishes, then "ready" or "failed"
+model_state = {"status": "loading", "error": None}
+
+# Model catalogue (computed once, TTS.list_models() may hit the network)
+model_catalogue = None
+model_catalogue_lock = threading.Lock()
 
 class TTSRequest(BaseModel):
     text: str
@@ -36,25 +46,73 @@ class TTSRequest(BaseModel):
 def load_tts_model():
     """Load Coqui TTS model (lazy loading)"""
     global tts_model
-    if tts_model is None:
-        try:
-            from TTS.api import TTS
-            print("🎤 Loading Coqui TTS model...")
-            # Using multilingual model that supports Arabic
-            tts_model = TTS(model_name="tts_models/multilingual/multi-dataset/xtts_v2", gpu=False)
-            print("✅ TTS Model loaded successfully!")
-        except Exception as e:
-            print(f"❌ Failed to load TTS model: {e}")
-            print("💡 Trying fallback model...")
+    with tts_model_lock:
+        if tts_model is None:
+            model_state["status"] = "loading"
             try:
-                # Fallback to a simpler model
-                tts_model = TTS(model_name="tts_models/en/ljspeech/tacotron2-DDC", gpu=False)
-                print("✅ Fallback model loaded!")
-            except Exception as e2:
-                print(f"❌ Fallback also failed: {e2}")
+                # Heavy import kept here so the server starts (and answers liveness) immediately
+                from TTS.api import TTS
+                try:
+                    print("🎤 Loading Coqui TTS model...")
+                    # Using multilingual model that supports Arabic
+                    tts_model = TTS(model_name="tts_models/multilingual/multi-dataset/xtts_v2", gpu=False)
+                    print("✅ TTS Model loaded successfully!")
+                except Exception as e:
+                    print(f"❌ Failed to load TTS model: {e}")
+                    print("💡 Trying fallback model...")
+                    # Fallback to a simpler model
+                    tts_model = TTS(model_name="tts_models/en/ljspeech/tacotron2-DDC", gpu=False)
+                    print("✅ Fallback model loaded!")
+            except Exception as e:
+                # Covers a missing TTS package too, so the status never sticks at "loading"
+                print(f"❌ Could not load a TTS model: {e}")
+                model_state["status"] = "failed"
+                model_state["error"] = str(e)
                 raise
+            model_state["status"] = "ready"
+            model_state["error"] = None
     return tts_model
 
+def synthesize(text: str, language: str, output_path: str):
+    """Write speech for ``text`` to ``output_path`` (loads the model if needed)"""
+    # Load model if not loaded (e.g. the background preload failed)
+    model = load_tts_model()
+    
+    # Check if model supports language parameter
+    try:
+        model.tts_to_file(
+            text=text,
+            file_path=output_path,
+            language=language
+        )
+    except TypeError:
+        # Model doesn't support language parameter
+        model.tts_to_file(
+            text=text,
+            file_path=output_path
+        )
+
+def get_model_catalogue():
+    """Return the list of available TTS models (computed once, then cached)"""
+    global model_catalogue
+    with model_catalogue_lock:
+        if model_catalogue is None:
+            from TTS.api import TTS
+            model_catalogue = TTS.list_models()
+    return model_catalogue
+
+async def preload_model_in_background():
+    """Load the TTS model in a worker thread so startup is not blocked"""
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, load_tts_model)
+        print("✅ Server ready!")
+    except Exception as e:
+        model_state["status"] = "failed"
+        model_state["error"] = str(e)
+        print(f"⚠️ Warning: Could not preload model: {e}")
+        print("Model will be loaded on first request.")
+
 @app.get("/")
 async def root():
     """Health check"""
@@ -64,13 +122,34 @@ async def root():
         "version": "1.0.0"
     }
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving HTTP"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: 200 once the TTS model is loaded, 503 while warming up"""
+    body = {
+        "status": model_state["status"],
+        "model_loaded": tts_model is not None,
+        "error": model_state["error"]
+    }
+    if tts_model is None:
+        return JSONResponse(status_code=503, content=body, headers={"Retry-After": "10"})
+    return body
+
 @app.post("/tts")
 async def text_to_speech(request: TTSRequest):
     """Convert text to speech"""
+    if tts_model is None and model_state["status"] == "loading":
+        raise HTTPException(
+            status_code=503,
+            detail="TTS model is still loading, try again shortly",
+            headers={"Retry-After": "10"}
+        )
+
     try:
-        # Load model if not loaded
-        model = load_tts_model()
-        
         # Generate unique filename
         audio_id = str(uuid.uuid4())
         output_path = os.path.join(OUTPUT_DIR, f"{audio_id}.wav")
@@ -78,19 +157,10 @@ async def text_to_speech(request: TTSRequest):
         # Generate speech
         print(f"🎙️ Generating speech for: {request.text[:50]}...")
         
-        # Check if model supports language parameter
-        try:
-            model.tts_to_file(
-                text=request.text,
-                file_path=output_path,
-                language=request.language
-            )
-        except TypeError:
-            # Model doesn't support language parameter
-            model.tts_to_file(
-                text=request.text,
-                file_path=output_path
-            )
+        # Model loading and synthesis block for a long time: run them in a
+        # worker thread so liveness and readiness probes keep answering
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, synthesize, request.text, request.language, output_path)
         
         print(f"✅ Audio generated: {output_path}")
         
@@ -109,8 +179,8 @@ async def text_to_speech(request: TTSRequest):
 async def list_models():
     """List available TTS models"""
     try:
-        from TTS.api import TTS
-        models = TTS.list_models()
+        loop = asyncio.get_running_loop()
+        models = await loop.run_in_executor(None, get_model_catalogue)
         return {"models": models}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -119,13 +189,9 @@ async def list_models():
 async def startup_event():
     """Preload TTS model on startup"""
     print("🚀 Starting Coqui TTS Server...")
-    print("📦 Preloading TTS model (this may take a minute)...")
-    try:
-        load_tts_model()
-        print("✅ Server ready!")
-    except Exception as e:
-        print(f"⚠️ Warning: Could not preload model: {e}")
-        print("Model will be loaded on first request.")
+    print("📦 Preloading TTS model in the background (this may take a minute)...")
+    # Keep a reference so the task is not garbage collected mid-load
+    app.state.preload_task = asyncio.create_task(preload_model_in_background())
 
 if __name__ == "__main__":
     import uvicorn